@@ -0,0 +1,454 @@
+"""Servicio HTTP/JSON con el núcleo de análisis de la aplicación.
+
+Expone los mismos datos que la página de Streamlit para otros sistemas:
+
+    GET /ohlcv?ticker=AAPL&period=1y&interval=1d[&start=...&end=...]
+    GET /stats?ticker=AAPL&period=1y&interval=1d
+    GET /indicators?ticker=AAPL&period=1y&interval=1d&name=sma&window=20
+    GET /export?ticker=AAPL&period=1y&interval=1d&format=csv|xlsx
+
+Las descargas reutilizan una sesión HTTP con conexiones en pool y las
+series se guardan en memoria (``SeriesStore``), de modo que los períodos más
+cortos se sirven sin volver a Yahoo. Las respuestas se cachean con un ETag
+derivado de la huella de los datos, admiten ``If-None-Match`` (304), gzip
+y formato Arrow (``format=arrow`` o ``Accept: application/vnd.apache.arrow.stream``).
+
+Uso:
+    python api.py [--host 127.0.0.1] [--port 8000] [--stub]
+
+Con ``--stub`` los datos se generan localmente (sin red) para pruebas de carga.
+"""
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from indicators import INDICATORS
+from ohlcv import OHLCVFrame
+from periods import SeriesStore, period_start
+from quality import split_field
+from resampling import CALENDAR_INTERVALS, INTRADAY_MINUTES, PERIOD_DAYS, plan_intervals, resample_ohlcv
+
+# Tiempo de vida de series y respuestas cacheadas (segundos)
+DEFAULT_TTL = 900
+
+# Respuestas cacheadas como máximo
+DEFAULT_CACHE_SIZE = 1024
+
+# Conexiones simultáneas por host en el pool de la sesión HTTP
+DEFAULT_POOL_SIZE = 16
+
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+
+# Formatos de respuesta admitidos por cada ruta (el primero es el por defecto)
+ROUTE_FORMATS = {
+    "/ohlcv": ["json", "arrow"],
+    "/stats": ["json"],
+    "/indicators": ["json", "arrow"],
+    "/export": ["csv", "xlsx"],
+}
+
+# Las respuestas más pequeñas no compensan comprimirse
+_GZIP_MIN_BYTES = 1024
+
+
+class ApiError(Exception):
+    """Error de la petición con su código HTTP."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class YahooUpstream:
+    """Descargas de Yahoo Finanzas sobre una única sesión HTTP con pool."""
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE):
+        self.pool_size = pool_size
+        self._session = None
+        self._lock = threading.Lock()
+
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                try:
+                    # Las versiones recientes de yfinance exigen una sesión de curl_cffi;
+                    # su pool de conexiones lo gestiona curl internamente
+                    from curl_cffi import requests as curl_requests
+                    self._session = curl_requests.Session(impersonate="chrome")
+                except ImportError:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    self._session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                    self._session.mount("https://", adapter)
+            return self._session
+
+    def fetch(self, ticker, period, interval):
+        import yfinance as yf
+        return yf.download(ticker, period=period, interval=interval,
+                           session=self.session(), progress=False)
+
+
+class StubUpstream:
+    """Upstream local y determinista para pruebas de carga (sin red).
+
+    Genera un paseo aleatorio por ticker con el mismo formato de columnas
+    que ``yf.download``; ``latency`` simula el tiempo de respuesta de Yahoo.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def fetch(self, ticker, period, interval):
+        if self.latency:
+            time.sleep(self.latency)
+        days = min(PERIOD_DAYS[period], 3653)
+        end = pd.Timestamp.now(tz="America/New_York").normalize().tz_localize(None)
+        sessions = pd.bdate_range(end=end, periods=max(int(days * 5 / 7), 1))
+        if interval in INTRADAY_MINUTES:
+            # Barras de la sesión regular, de 9:30 a 16:00 hora de Nueva York
+            offsets = pd.to_timedelta(np.arange(570, 960, INTRADAY_MINUTES[interval]), unit="min")
+            index = pd.DatetimeIndex((sessions.values[:, None] + offsets.values[None, :]).ravel())
+            index = index.tz_localize("America/New_York")
+        else:
+            index = sessions
+
+        rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(index))))
+        spread = np.abs(rng.normal(0, 0.005, len(index))) * close
+        data = {
+            ("Close", ticker): close,
+            ("High", ticker): close + spread,
+            ("Low", ticker): close - spread,
+            ("Open", ticker): close + rng.uniform(-1, 1, len(index)) * spread,
+            ("Volume", ticker): rng.integers(1_000, 1_000_000, len(index)),
+        }
+        frame = pd.DataFrame(data, index=index)
+        frame.columns.names = ["Price", "Ticker"]
+        frame.index.name = "Datetime" if interval in INTRADAY_MINUTES else "Date"
+        return frame
+
+
+def fingerprint(frame):
+    """Huella corta del contenido de ``frame`` (índice y columnas)."""
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update(frame.index.tobytes())
+    for name, values in frame.columns.items():
+        digest.update(name.encode())
+        digest.update(values.tobytes() if values.dtype.kind != "O" else repr(values.tolist()).encode())
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """Caché LRU de respuestas con caducidad, segura entre hilos."""
+
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE, ttl=DEFAULT_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["expires"] < time.monotonic():
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        entry["expires"] = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+class AnalysisService:
+    """Núcleo de análisis: series, estadísticos, indicadores y exportación."""
+
+    def __init__(self, upstream, ttl=DEFAULT_TTL):
+        self.upstream = upstream
+        self.ttl = ttl
+        self.store = SeriesStore(ttl=ttl)
+        # El candado compartido solo protege el almacén y los candados por serie
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def series(self, ticker, period, interval, start=None, end=None):
+        """Ventana OHLCV pedida, descargando solo si no está en memoria."""
+        if period not in PERIOD_DAYS:
+            raise ApiError(400, f"Período no soportado: {period}")
+        if interval not in INTRADAY_MINUTES and interval not in CALENDAR_INTERVALS:
+            raise ApiError(400, f"Intervalo no soportado: {interval}")
+        fetch_interval, interval = plan_intervals(period, interval)
+        key = (ticker, fetch_interval, interval)
+
+        with self._lock:
+            frame = self.store.get(key, period)
+            if frame is None:
+                key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        if frame is None:
+            # Una sola descarga por serie: las peticiones concurrentes de la
+            # misma clave esperan a la primera y las demás claves no se bloquean
+            with key_lock:
+                with self._lock:
+                    frame = self.store.get(key, period)
+                if frame is None:
+                    try:
+                        frame = self._download(key, ticker, period)
+                    finally:
+                        # El candado solo vive mientras dura la descarga: los
+                        # que ya esperan lo conservan y encuentran la serie guardada
+                        with self._lock:
+                            if self._key_locks.get(key) is key_lock:
+                                del self._key_locks[key]
+
+        if start or end:
+            frame = frame.window(start, end)
+        return frame
+
+    def _download(self, key, ticker, period):
+        """Descarga la serie de ``key`` y la guarda en el almacén."""
+        _, fetch_interval, interval = key
+        try:
+            data = self.upstream.fetch(ticker, period, fetch_interval)
+        except Exception as e:
+            raise ApiError(502, f"Error al descargar datos: {e}")
+        if data.empty:
+            raise ApiError(404, "No se encontraron datos para este activo en el período seleccionado.")
+        if fetch_interval != interval:
+            data = resample_ohlcv(data, interval)
+        frame = OHLCVFrame.from_download(data)
+        with self._lock:
+            self.store.put(key, period, frame)
+        return frame.window(period_start(frame, period))
+
+    def stats(self, frame):
+        """Estadísticos descriptivos por columna (los de la tabla de la app)."""
+        result = {}
+        for name, values in frame.columns.items():
+            if values.dtype.kind not in "fiu":
+                continue
+            values = values.astype(np.float64)
+            valid = values[~np.isnan(values)]
+            if len(valid) == 0:
+                result[name] = {"count": 0}
+                continue
+            q1, median, q3 = np.percentile(valid, [25, 50, 75])
+            result[name] = {
+                "count": int(len(valid)),
+                "mean": float(valid.mean()),
+                "std": float(valid.std(ddof=1)) if len(valid) > 1 else None,
+                "min": float(valid.min()),
+                "q1": float(q1),
+                "median": float(median),
+                "q3": float(q3),
+                "max": float(valid.max()),
+            }
+        return result
+
+    def indicator(self, frame, name, window):
+        """Indicador ``name`` sobre la columna de cierre de ``frame``."""
+        if name not in INDICATORS:
+            raise ApiError(400, f"Indicador no soportado: {name}")
+        close = next((values for col, values in frame.columns.items() if split_field(col)[0] == "Close"), None)
+        if close is None:
+            raise ApiError(404, "La serie no tiene columna de cierre.")
+        return pd.DataFrame({
+            frame.index_name: frame.dates(),
+            "close": close,
+            f"{name}_{window}": INDICATORS[name](close, window),
+        })
+
+
+def _json_body(payload):
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _frame_body(df, fmt):
+    """Serializa un DataFrame como JSON (orient=split) o Arrow IPC."""
+    if fmt == "arrow":
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ApiError(406, "El formato Arrow requiere pyarrow.")
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue(), ARROW_MIME
+    return df.to_json(orient="split", index=False, date_format="iso").encode("utf-8"), "application/json"
+
+
+def make_handler(service, cache):
+    """Crea la clase de handler HTTP ligada a ``service`` y ``cache``."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Las respuestas se escriben de una vez: sin Nagle no esperan al ACK
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            # El registro por petición frena las pruebas de carga
+            pass
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            formats = ROUTE_FORMATS.get(url.path)
+            if formats is None:
+                return self._send(404, _json_body({"error": f"Ruta no encontrada: {url.path}"}), "application/json")
+            fmt = query.get("format", "").lower()
+            if not fmt:
+                accept = self.headers.get("Accept", "")
+                fmt = "arrow" if ARROW_MIME in accept and "arrow" in formats else formats[0]
+            elif fmt not in formats:
+                return self._send(400, _json_body({"error": f"Formato no soportado en {url.path}: {fmt}"}),
+                                  "application/json")
+            key = (url.path, tuple(sorted(query.items())), fmt)
+
+            entry = cache.get(key)
+            if entry is None:
+                try:
+                    entry = self._build(url.path, query, fmt)
+                except ApiError as e:
+                    return self._send(e.status, _json_body({"error": str(e)}), "application/json")
+                except (ValueError, TypeError) as e:
+                    # Parámetros mal formados (p. ej. fechas de start/end inválidas)
+                    return self._send(400, _json_body({"error": str(e)}), "application/json")
+                cache.put(key, entry)
+
+            if entry["etag"] in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+                return self._send(304, b"", None, etag=entry["etag"])
+
+            body = entry["body"]
+            encoding = None
+            if "gzip" in self.headers.get("Accept-Encoding", "") and len(body) >= _GZIP_MIN_BYTES:
+                if "gzip" not in entry:
+                    entry["gzip"] = gzip.compress(body, compresslevel=5)
+                body, encoding = entry["gzip"], "gzip"
+            self._send(200, body, entry["content_type"], etag=entry["etag"],
+                       encoding=encoding, filename=entry.get("filename"))
+
+        def _build(self, path, query, fmt):
+            routes = {
+                "/ohlcv": self._ohlcv,
+                "/stats": self._stats,
+                "/indicators": self._indicators,
+                "/export": self._export,
+            }
+            ticker = query.get("ticker")
+            if not ticker:
+                raise ApiError(400, "Falta el parámetro 'ticker'.")
+            frame = service.series(
+                ticker.upper(),
+                query.get("period", "1y"),
+                query.get("interval", "1d"),
+                query.get("start"),
+                query.get("end"),
+            )
+            entry = routes[path](frame, query, fmt)
+            # El ETag combina la huella de los datos con la ruta y los parámetros
+            params = hashlib.blake2b(repr((path, sorted(query.items()), fmt)).encode(), digest_size=6).hexdigest()
+            entry["etag"] = f'"{fingerprint(frame)}-{params}"'
+            return entry
+
+        def _ohlcv(self, frame, query, fmt):
+            body, content_type = _frame_body(frame.to_frame(), fmt)
+            return {"body": body, "content_type": content_type}
+
+        def _stats(self, frame, query, fmt):
+            return {"body": _json_body(service.stats(frame)), "content_type": "application/json"}
+
+        def _indicators(self, frame, query, fmt):
+            try:
+                window = int(query.get("window", 20))
+            except ValueError:
+                raise ApiError(400, "El parámetro 'window' debe ser un entero.")
+            if window < 1:
+                raise ApiError(400, "El parámetro 'window' debe ser positivo.")
+            df = service.indicator(frame, query.get("name", "sma").lower(), window)
+            body, content_type = _frame_body(df, fmt)
+            return {"body": body, "content_type": content_type}
+
+        def _export(self, frame, query, fmt):
+            df = frame.to_frame()
+            ticker = query["ticker"].upper()
+            if fmt == "csv":
+                body = df.to_csv(index=False, encoding="utf-8").encode("utf-8")
+                return {"body": body, "content_type": "text/csv", "filename": f"{ticker}.csv"}
+            if fmt == "xlsx":
+                # Las fechas con zona horaria no se pueden escribir en Excel
+                for col in df.select_dtypes(include=["datetimetz"]).columns:
+                    df[col] = df[col].dt.tz_localize(None)
+                output = io.BytesIO()
+                with pd.ExcelWriter(output, engine="openpyxl") as writer:
+                    df.to_excel(writer, index=False, sheet_name="Datos")
+                return {
+                    "body": output.getvalue(),
+                    "content_type": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    "filename": f"{ticker}.xlsx",
+                }
+            raise ApiError(400, f"Formato de exportación no soportado: {fmt}")
+
+        def _send(self, status, body, content_type, etag=None, encoding=None, filename=None):
+            self.send_response(status)
+            if content_type:
+                self.send_header("Content-Type", content_type)
+            if etag:
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", f"max-age={cache.ttl}")
+            if encoding:
+                self.send_header("Content-Encoding", encoding)
+            self.send_header("Vary", "Accept, Accept-Encoding")
+            if filename:
+                self.send_header("Content-Disposition", f'attachment; filename="{filename}"')
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio HTTP/JSON de análisis financiero")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--ttl", type=int, default=DEFAULT_TTL, help="segundos de vida de series y respuestas")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE)
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE)
+    parser.add_argument("--stub", action="store_true", help="usar datos sintéticos locales en lugar de Yahoo")
+    parser.add_argument("--stub-latency", type=float, default=0.0, help="latencia simulada del upstream (s)")
+    args = parser.parse_args()
+
+    upstream = StubUpstream(args.stub_latency) if args.stub else YahooUpstream(args.pool_size)
+    service = AnalysisService(upstream, ttl=args.ttl)
+    cache = ResponseCache(args.cache_size, args.ttl)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service, cache))
+    print(f"Sirviendo en http://{args.host}:{args.port} ({'stub' if args.stub else 'Yahoo Finanzas'})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""Backtest vectorizado de portafolios multiactivo.
+
+Simula la curva de capital de una cesta ponderada sobre la matriz de
+precios alineada (barras x activos), con rebalanceo periódico y reglas de
+señal simples. La simulación se resuelve por tramos entre rebalanceos con
+operaciones NumPy, sin bucles por barra, y los barridos de parámetros se
+reparten entre procesos.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from quality import split_field
+
+# Frecuencias de rebalanceo soportadas
+REBALANCE_FREQUENCIES = {
+    "Sin rebalanceo": "none",
+    "Diario": "D",
+    "Semanal": "W",
+    "Mensual": "M",
+    "Trimestral": "Q",
+}
+
+# Reglas de señal soportadas
+SIGNAL_RULES = {
+    "Siempre invertido": "none",
+    "Precio sobre media móvil": "sma",
+    "Momentum positivo": "momentum",
+}
+
+_DAY_NS = 86_400 * 10**9
+
+# Duración de la sesión regular en segundos (para anualizar datos intradía)
+_SESSION_SECONDS = 6.5 * 3600
+
+
+def price_matrix(frame, tickers):
+    """Matriz de cierres (barras x activos) de ``tickers`` en ``frame``.
+
+    Devuelve ``(prices, found)``, donde ``found`` son los tickers con
+    columna ``Close`` en el orden de ``prices``.
+    """
+    closes = {}
+    for name, values in frame.columns.items():
+        field, group = split_field(name)
+        if field == "Close":
+            closes[group] = values
+    if len(tickers) == 1 and "" in closes:
+        # Descarga de un solo ticker sin sufijo en la columna
+        closes[tickers[0]] = closes.pop("")
+    found = [ticker for ticker in tickers if ticker in closes]
+    if not found:
+        return np.empty((len(frame), 0)), found
+    prices = np.column_stack([closes[ticker] for ticker in found]).astype(np.float64)
+    return prices, found
+
+
+def _ffill_2d(prices):
+    """Forward-fill por columna; los NaN iniciales se mantienen."""
+    mask = np.isnan(prices)
+    if not mask.any():
+        return prices
+    rows = np.where(mask, 0, np.arange(len(prices))[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return prices[rows, np.arange(prices.shape[1])]
+
+
+def rebalance_mask(index, frequency):
+    """Marca la primera barra de cada período de rebalanceo."""
+    mask = np.zeros(len(index), dtype=bool)
+    if len(index) == 0:
+        return mask
+    mask[0] = True
+    if frequency == "none":
+        return mask
+    days = index.astype("datetime64[D]").astype(np.int64)
+    if frequency == "D":
+        periods = days
+    elif frequency == "W":
+        # 1970-01-01 fue jueves: se desplaza para que la semana empiece en lunes
+        periods = (days + 3) // 7
+    elif frequency == "M":
+        periods = index.astype("datetime64[M]").astype(np.int64)
+    elif frequency == "Q":
+        periods = index.astype("datetime64[M]").astype(np.int64) // 3
+    else:
+        raise ValueError(f"Frecuencia de rebalanceo no soportada: {frequency}")
+    mask[1:] = periods[1:] != periods[:-1]
+    return mask
+
+
+def signal_matrix(prices, rule, window=50):
+    """Matriz booleana: ``True`` si la regla indica estar invertido en el activo.
+
+    La señal de cada barra usa solo datos hasta la barra anterior para no
+    mirar al futuro. Cada activo necesita ``window`` precios válidos propios
+    (``window + 1`` para momentum) antes de poder invertirse, de modo que los
+    que cotizan desde más tarde no se activan con una media incompleta.
+    """
+    n = len(prices)
+    if rule == "none":
+        return np.ones(prices.shape, dtype=bool)
+    active = np.zeros(prices.shape, dtype=bool)
+    if n <= window:
+        return active
+    # Precios válidos acumulados por activo (tras el forward-fill solo faltan los iniciales)
+    valid_count = np.cumsum(np.isfinite(prices), axis=0)
+    if rule == "sma":
+        cumsum = np.cumsum(np.nan_to_num(prices), axis=0)
+        sma = (cumsum[window - 1:] - np.vstack([np.zeros((1, prices.shape[1])), cumsum[:-window]])) / window
+        with np.errstate(invalid="ignore"):
+            raw = (prices[window - 1:] > sma) & (valid_count[window - 1:] >= window)
+        active[window:] = raw[:-1]
+    elif rule == "momentum":
+        with np.errstate(invalid="ignore"):
+            raw = (prices[window:] > prices[:-window]) & (valid_count[window:] >= window + 1)
+        active[window + 1:] = raw[:-1]
+    else:
+        raise ValueError(f"Regla de señal no soportada: {rule}")
+    return active
+
+
+def periods_per_year(index):
+    """Número de barras por año según el espaciado mediano del índice."""
+    if len(index) < 2:
+        return 252.0
+    step = float(np.median(np.diff(index).astype(np.int64)))
+    if step < _DAY_NS:
+        return 252.0 * _SESSION_SECONDS / (step / 10**9)
+    days = step / _DAY_NS
+    if days < 2:
+        return 252.0
+    if days < 8:
+        return 52.0
+    if days < 40:
+        return 12.0
+    return 4.0
+
+
+def simulate(prices, index, weights, frequency="M", rule="none", window=50, cost_bps=0.0):
+    """Simula la cartera y devuelve un diccionario con curva y métricas.
+
+    ``weights`` se normalizan a suma 1; la parte de un activo sin señal o
+    sin precio queda en efectivo (rentabilidad 0). Entre rebalanceos las
+    posiciones derivan con los precios; en cada rebalanceo (y en cada cambio
+    de señal) se vuelve a los pesos objetivo pagando ``cost_bps`` sobre la
+    rotación.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    weights = weights / weights.sum()
+    prices = _ffill_2d(prices)
+    n = len(prices)
+
+    signals = signal_matrix(prices, rule, window)
+    starts_mask = rebalance_mask(index, frequency)
+    starts_mask[1:] |= (signals[1:] != signals[:-1]).any(axis=1)
+    starts = np.flatnonzero(starts_mask)
+    segment = np.cumsum(starts_mask) - 1
+
+    # Pesos objetivo de cada tramo y su parte en efectivo
+    base = prices[starts]
+    target = weights * signals[starts] * np.isfinite(base)
+    cash = 1.0 - target.sum(axis=1)
+    base = np.where(np.isfinite(base), base, 1.0)
+
+    # Crecimiento dentro de cada tramo respecto a su barra inicial
+    with np.errstate(invalid="ignore"):
+        relative = np.nan_to_num(prices / base[segment], nan=1.0)
+    growth = cash[segment] + (target[segment] * relative).sum(axis=1)
+
+    # Crecimiento de cada tramo hasta la barra inicial del siguiente
+    end_relative = np.nan_to_num(prices[starts[1:]] / base[:-1], nan=1.0)
+    end_growth = cash[:-1] + (target[:-1] * end_relative).sum(axis=1)
+
+    # Rotación: distancia entre los pesos que derivaron y los nuevos objetivos
+    drifted = (target[:-1] * end_relative) / end_growth[:, None]
+    turnover = np.empty(len(starts))
+    turnover[0] = target[0].sum()
+    turnover[1:] = np.abs(target[1:] - drifted).sum(axis=1)
+    costs = 1.0 - turnover * cost_bps / 10_000
+
+    start_values = np.cumprod(np.concatenate(([1.0], end_growth))) * np.cumprod(costs)
+    equity = start_values[segment] * growth
+
+    drawdown = equity / np.maximum.accumulate(equity) - 1.0
+    returns = np.diff(equity) / equity[:-1] if n > 1 else np.empty(0)
+    ppy = periods_per_year(index)
+    std = returns.std() if len(returns) else 0.0
+    sharpe = returns.mean() / std * np.sqrt(ppy) if std > 0 else 0.0
+    years = n / ppy
+
+    return {
+        "equity": equity,
+        "drawdown": drawdown,
+        "total_return": equity[-1] - 1.0 if n else 0.0,
+        "cagr": equity[-1] ** (1 / years) - 1.0 if n and years > 0 else 0.0,
+        "max_drawdown": drawdown.min() if n else 0.0,
+        "sharpe": sharpe,
+        "turnover": turnover.sum() / years if years > 0 else 0.0,
+        "rebalances": len(starts),
+    }
+
+
+def _run_chunk(prices, index, combos, rule, window, cost_bps):
+    rows = []
+    for weights, frequency in combos:
+        result = simulate(prices, index, weights, frequency, rule, window, cost_bps)
+        rows.append({
+            "weights": weights,
+            "frequency": frequency,
+            "total_return": result["total_return"],
+            "cagr": result["cagr"],
+            "max_drawdown": result["max_drawdown"],
+            "sharpe": result["sharpe"],
+            "turnover": result["turnover"],
+        })
+    return rows
+
+
+def random_weights(n_assets, n_sets, seed=0):
+    """``n_sets`` vectores de pesos aleatorios (Dirichlet uniforme)."""
+    return np.random.default_rng(seed).dirichlet(np.ones(n_assets), size=n_sets)
+
+
+def sweep(prices, index, weight_sets, frequencies, rule="none", window=50, cost_bps=0.0, max_workers=None):
+    """Evalúa todas las combinaciones de pesos y frecuencias en paralelo.
+
+    Las combinaciones se reparten en un bloque por proceso para enviar la
+    matriz de precios una sola vez a cada uno. Devuelve un DataFrame
+    ordenado por Sharpe descendente.
+    """
+    combos = [(tuple(w), f) for w in np.asarray(weight_sets) for f in frequencies]
+    workers = max_workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(combos)))
+    chunks = [combos[i::workers] for i in range(workers)]
+
+    if workers == 1:
+        rows = _run_chunk(prices, index, combos, rule, window, cost_bps)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_run_chunk, prices, index, chunk, rule, window, cost_bps)
+                for chunk in chunks
+            ]
+            rows = [row for future in futures for row in future.result()]
+
+    return pd.DataFrame(rows).sort_values("sharpe", ascending=False, ignore_index=True)
@@ -0,0 +1,36 @@
+"""Indicadores técnicos vectorizados sobre arreglos de precios."""
+import numpy as np
+import pandas as pd
+
+
+def sma(values, window):
+    """Media móvil simple; las primeras ``window - 1`` barras son NaN."""
+    values = np.asarray(values, dtype=np.float64)
+    return pd.Series(values).rolling(window, min_periods=window).mean().to_numpy()
+
+
+def ema(values, window):
+    """Media móvil exponencial con ``span = window``."""
+    values = np.asarray(values, dtype=np.float64)
+    return pd.Series(values).ewm(span=window, adjust=False, min_periods=window).mean().to_numpy()
+
+
+def rsi(values, window=14):
+    """Índice de fuerza relativa con suavizado de Wilder."""
+    values = np.asarray(values, dtype=np.float64)
+    delta = np.diff(values, prepend=np.nan)
+    gains = pd.Series(np.where(delta > 0, delta, 0.0))
+    losses = pd.Series(np.where(delta < 0, -delta, 0.0))
+    avg_gain = gains.ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+    avg_loss = losses.ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain.to_numpy() / avg_loss.to_numpy()
+    return np.where(np.isinf(rs), 100.0, 100.0 - 100.0 / (1.0 + rs))
+
+
+# Indicadores disponibles por nombre
+INDICATORS = {
+    "sma": sma,
+    "ema": ema,
+    "rsi": rsi,
+}
@@ -0,0 +1,78 @@
+"""Mide el tiempo de arranque en frío de las aplicaciones Streamlit.
+
+Cada medición ejecuta el script en un intérprete nuevo (sin cachés de
+importación en memoria), tal como ocurre al iniciar un pod o un worker.
+Además verifica que las dependencias pesadas que controla la aplicación
+(yfinance, openpyxl) no se carguen cuando todavía no hay datos. Plotly no
+se comprueba: ``import streamlit`` ya lo importa para ``st.plotly_chart``.
+
+Uso:
+    python medir_arranque.py [--repeticiones N] [--presupuesto SEGUNDOS]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+# Presupuesto de arranque en frío por defecto (segundos)
+DEFAULT_BUDGET = 2.0
+
+APPS = ["yahoofinance.py", "yahoofinanceZ.py"]
+
+# Módulos que no deben importarse durante el arranque (los que Streamlit no
+# carga por sí mismo)
+HEAVY_MODULES = ["yfinance", "openpyxl"]
+
+_PROBE = """
+import json, runpy, sys, time
+t0 = time.perf_counter()
+runpy.run_path(sys.argv[1], run_name="__main__")
+elapsed = time.perf_counter() - t0
+heavy = [m for m in json.loads(sys.argv[2]) if m in sys.modules]
+print(json.dumps({"elapsed": elapsed, "heavy": heavy}))
+"""
+
+
+def measure(app, repetitions):
+    """Ejecuta ``app`` ``repetitions`` veces y devuelve (tiempos, módulos pesados)."""
+    times = []
+    heavy = set()
+    for _ in range(repetitions):
+        result = subprocess.run(
+            [sys.executable, "-c", _PROBE, app, json.dumps(HEAVY_MODULES)],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(app).parent,
+        )
+        # La última línea es la de la sonda; Streamlit puede escribir avisos antes
+        probe = json.loads(result.stdout.strip().splitlines()[-1])
+        times.append(probe["elapsed"])
+        heavy.update(probe["heavy"])
+    return times, sorted(heavy)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--presupuesto", type=float, default=DEFAULT_BUDGET)
+    args = parser.parse_args()
+
+    root = Path(__file__).parent
+    ok = True
+    for app in APPS:
+        times, heavy = measure(str(root / app), args.repeticiones)
+        median = statistics.median(times)
+        status = "OK" if median <= args.presupuesto and not heavy else "FALLO"
+        ok = ok and status == "OK"
+        print(f"{app:<20} mediana={median:.3f}s  máx={max(times):.3f}s  "
+              f"presupuesto={args.presupuesto:.1f}s  [{status}]")
+        if heavy:
+            print(f"  ⚠️ Módulos pesados cargados al arrancar: {', '.join(heavy)}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Mide el tiempo del control de calidad sobre una serie grande.
+
+Genera una serie OHLCV sintética de barras de 1 minuto (con NaN, volumen
+cero, un split y algunos atípicos) y cronometra ``check_quality`` con cada
+método de outliers frente al presupuesto.
+
+Uso:
+    python medir_calidad.py [--filas N] [--repeticiones N] [--presupuesto SEGUNDOS]
+"""
+import argparse
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from ohlcv import OHLCVFrame
+from quality import check_quality
+
+# Presupuesto por defecto para 10M filas (segundos)
+DEFAULT_BUDGET = 1.0
+
+DEFAULT_ROWS = 10_000_000
+
+
+def synthetic_frame(rows, seed=0):
+    """Serie OHLCV de ``rows`` barras de 1 minuto con incidencias conocidas."""
+    rng = np.random.default_rng(seed)
+    index = np.datetime64("2005-01-03T14:30", "ns") + np.arange(rows) * np.timedelta64(1, "m")
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.0005, rows)))
+    close[rows // 2:] /= 2  # split 2:1 sin ajustar
+    spread = np.abs(rng.normal(0, 0.0005, rows)) * close
+    volume = rng.integers(0, 10_000, rows)
+    columns = {
+        "Open": close + spread / 2,
+        "High": close + spread,
+        "Low": close - spread,
+        "Close": close,
+        "Volume": volume,
+    }
+    nan_rows = rng.integers(0, rows, rows // 1000)
+    for name in ("Open", "High", "Low", "Close"):
+        columns[name][nan_rows] = np.nan
+    return OHLCVFrame(index, columns, index_name="Datetime")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--presupuesto", type=float, default=DEFAULT_BUDGET)
+    args = parser.parse_args()
+
+    frame = synthetic_frame(args.filas)
+    ok = True
+    for method in ("mad", "zscore"):
+        times = []
+        for _ in range(args.repeticiones):
+            t0 = time.perf_counter()
+            check_quality(frame, method=method)
+            times.append(time.perf_counter() - t0)
+        median = statistics.median(times)
+        status = "OK" if median <= args.presupuesto else "FALLO"
+        ok = ok and status == "OK"
+        print(f"{method:<8} filas={args.filas:,}  mediana={median:.3f}s  "
+              f"presupuesto={args.presupuesto:.1f}s  [{status}]")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Contenedor OHLCV compacto.
+
+Guarda cada columna como un arreglo NumPy contiguo (precios en float64, o
+float32 si se pide; volumen entero en int64) junto a un índice
+``datetime64[ns]`` ordenado.
+Las ventanas temporales se obtienen con búsqueda binaria y son vistas sobre
+los mismos arreglos, sin copiar datos.
+"""
+import numpy as np
+import pandas as pd
+
+# Tipo por defecto para columnas de precio; float32 ocupa la mitad pero
+# muestra artefactos de redondeo en las tablas (189.839996 en vez de 189.84)
+PRICE_DTYPE = np.float64
+
+# Tipo opcional para reducir a la mitad la memoria de los precios
+COMPACT_PRICE_DTYPE = np.float32
+
+
+def _is_volume(name):
+    return "volume" in str(name).lower()
+
+
+def _flatten(column):
+    """Convierte una columna multiíndice de yfinance en un string simple."""
+    if isinstance(column, tuple):
+        return " ".join(str(c) for c in column).strip()
+    return str(column)
+
+
+def _compact(values, name, price_dtype):
+    """Devuelve ``values`` con el tipo compacto que le corresponde."""
+    if _is_volume(name) and values.dtype.kind in "fiu":
+        # Las uniones de varios tickers dejan NaN en el volumen (no son barras
+        # sin operaciones) y un archivo puede traer volumen fraccionario: en
+        # ambos casos se conserva en float64 para no truncar
+        if values.dtype.kind == "f" and not (np.isfinite(values).all() and np.array_equal(values, np.trunc(values))):
+            return np.ascontiguousarray(values, dtype=np.float64)
+        return np.ascontiguousarray(values, dtype=np.int64)
+    if values.dtype.kind == "f":
+        return np.ascontiguousarray(values, dtype=price_dtype)
+    return np.ascontiguousarray(values)
+
+
+class OHLCVFrame:
+    """Serie OHLCV con índice temporal y columnas en arreglos contiguos."""
+
+    def __init__(self, index, columns, index_name="Date", tz=None):
+        self.index = index
+        self.columns = columns
+        self.index_name = index_name
+        self.tz = tz
+
+    @classmethod
+    def from_download(cls, data, price_dtype=PRICE_DTYPE):
+        """Construye el contenedor a partir del resultado de ``yf.download``.
+
+        Las columnas multiíndice se aplanan igual que en la app
+        (``'Close AAPL'`` o ``'AAPL Close'``) y no se hace ninguna copia
+        defensiva del DataFrame original.
+        """
+        index = pd.DatetimeIndex(data.index)
+        tz = index.tz
+        if tz is not None:
+            index = index.tz_convert("UTC").tz_localize(None)
+        columns = {}
+        for col in data.columns:
+            name = _flatten(col)
+            columns[name] = _compact(data[col].to_numpy(), name, price_dtype)
+        return cls(index.to_numpy(dtype="datetime64[ns]"), columns,
+                   index_name=data.index.name or "Date", tz=tz)
+
+    @classmethod
+    def from_dataframe(cls, df, date_col, price_dtype=PRICE_DTYPE):
+        """Construye el contenedor a partir de un archivo cargado.
+
+        ``date_col`` se convierte a ``datetime64`` y se usa como índice; el
+        resto de columnas numéricas se compactan y las de texto se conservan.
+        Las filas se ordenan por fecha si el archivo no lo estaba.
+        """
+        dates = pd.to_datetime(df[date_col], errors="coerce")
+        tz = getattr(dates.dt, "tz", None)
+        if tz is not None:
+            dates = dates.dt.tz_convert("UTC").dt.tz_localize(None)
+        index = dates.to_numpy(dtype="datetime64[ns]")
+        order = None
+        if len(index) > 1 and not (index[1:] >= index[:-1]).all():
+            order = np.argsort(index, kind="stable")
+            index = index[order]
+        columns = {}
+        for col in df.columns:
+            if col == date_col:
+                continue
+            values = df[col].to_numpy()
+            if order is not None:
+                values = values[order]
+            columns[str(col)] = _compact(values, col, price_dtype)
+        return cls(index, columns, index_name=str(date_col), tz=tz)
+
+    def __len__(self):
+        return len(self.index)
+
+    def _to_index_time(self, value):
+        """Convierte una fecha al mismo sistema que ``self.index``."""
+        value = pd.Timestamp(value)
+        if self.tz is not None:
+            if value.tz is None:
+                value = value.tz_localize(self.tz)
+            value = value.tz_convert("UTC").tz_localize(None)
+        elif value.tz is not None:
+            value = value.tz_localize(None)
+        return value.to_datetime64().astype("datetime64[ns]")
+
+    def window(self, start=None, end=None):
+        """Vista de las barras con ``start <= fecha <= end`` (sin copia)."""
+        lo = 0 if start is None else np.searchsorted(self.index, self._to_index_time(start), side="left")
+        hi = len(self.index) if end is None else np.searchsorted(self.index, self._to_index_time(end), side="right")
+        return OHLCVFrame(
+            self.index[lo:hi],
+            {name: values[lo:hi] for name, values in self.columns.items()},
+            index_name=self.index_name,
+            tz=self.tz,
+        )
+
+    def _is_price(self, name, values):
+        return values.dtype.kind == "f" and not _is_volume(name)
+
+    def astype_prices(self, price_dtype):
+        """Serie con las columnas de precio en ``price_dtype`` (sin copia si ya lo están)."""
+        if all(values.dtype == price_dtype for name, values in self.columns.items()
+               if self._is_price(name, values)):
+            return self
+        columns = {
+            name: values.astype(price_dtype) if self._is_price(name, values) else values
+            for name, values in self.columns.items()
+        }
+        return OHLCVFrame(self.index, columns, index_name=self.index_name, tz=self.tz)
+
+    def nbytes(self, price_dtype=None):
+        """Memoria ocupada por el índice y las columnas, en bytes.
+
+        Con ``price_dtype`` se estima la que ocuparía con ese tipo de precios.
+        """
+        total = self.index.nbytes
+        for name, values in self.columns.items():
+            if price_dtype is not None and self._is_price(name, values):
+                total += len(values) * np.dtype(price_dtype).itemsize
+            else:
+                total += values.nbytes
+        return total
+
+    def dates(self):
+        """Índice como ``DatetimeIndex`` en la zona horaria original."""
+        dates = pd.DatetimeIndex(self.index)
+        if self.tz is not None:
+            dates = dates.tz_localize("UTC").tz_convert(self.tz)
+        return dates
+
+    def to_frame(self):
+        """DataFrame con la fecha como primera columna y las demás sin copiar."""
+        data = {self.index_name: self.dates()}
+        data.update(self.columns)
+        return pd.DataFrame(data, copy=False)
@@ -0,0 +1,125 @@
+"""Índice de períodos sobre series ya descargadas.
+
+Por cada (ticker, intervalo base, intervalo) se conserva la serie de mayor
+rango descargada en la sesión; los períodos más cortos (incluido "ytd") se
+responden con una ventana por búsqueda binaria sobre cualquier serie del
+mismo ticker e intervalo, aunque se haya derivado de otro intervalo base, sin
+volver a llamar a Yahoo. Las series caducan tras ``ttl`` segundos para poder
+refrescar los precios.
+"""
+import time
+
+import pandas as pd
+
+# Desplazamientos de calendario para los períodos de Yahoo
+PERIOD_OFFSETS = {
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+# Sesiones bursátiles que cubren los períodos diarios de Yahoo
+PERIOD_SESSIONS = {
+    "1d": 1,
+    "5d": 5,
+}
+
+
+def period_start(frame, period):
+    """Primera fecha (zona horaria local) incluida en ``period``.
+
+    Se mide hacia atrás desde la última barra de ``frame``. Devuelve
+    ``None`` para "max" o si la serie está vacía.
+    """
+    if period == "max" or len(frame) == 0:
+        return None
+    last = frame.dates()[-1]
+    if period == "ytd":
+        return last.normalize().replace(month=1, day=1)
+    if period in PERIOD_SESSIONS:
+        sessions = _last_sessions(frame, PERIOD_SESSIONS[period])
+        return sessions[max(len(sessions) - PERIOD_SESSIONS[period], 0)]
+    return last - PERIOD_OFFSETS[period]
+
+
+def _last_sessions(frame, count):
+    """Fechas de las últimas sesiones de ``frame`` (como mucho ``count``)."""
+    # Solo se examinan las últimas semanas: la cola se obtiene sin copia
+    last = frame.dates()[-1]
+    tail = frame.window(last - pd.Timedelta(days=14 * count))
+    return tail.dates().normalize().unique()[-count:]
+
+
+def covers(frame, stored_period, period):
+    """Indica si ``frame``, descargada con ``stored_period``, contiene ``period``.
+
+    Se compara el inicio real de los períodos y no su duración nominal: una
+    serie "ytd" descargada en febrero no cubre "1y" aunque ambos períodos
+    midan 366 días. Un activo que cotiza desde hace poco sigue cubriendo
+    los períodos más cortos que el descargado aunque su primera barra sea
+    posterior al inicio pedido.
+    """
+    if stored_period in (period, "max"):
+        return True
+    if period == "max" or len(frame) == 0:
+        return False
+    if stored_period in PERIOD_SESSIONS:
+        # "1d"/"5d" solo contienen sus últimas sesiones
+        return period in PERIOD_SESSIONS and PERIOD_SESSIONS[period] <= PERIOD_SESSIONS[stored_period]
+    start = period_start(frame, period)
+    return frame.dates()[0] <= start or period_start(frame, stored_period) <= start
+
+
+class SeriesStore:
+    """Series OHLCV de la sesión, indexadas por (ticker, intervalo base, intervalo).
+
+    ``ttl`` (segundos) limita cuánto se reutiliza una serie antes de volver
+    a descargarla; las series caducadas se eliminan al guardar otra.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self._series = {}
+
+    def _expired(self, stored):
+        return self.ttl is not None and time.monotonic() - stored[2] >= self.ttl
+
+    def put(self, key, period, frame):
+        """Guarda ``frame``, recién descargada, en lugar de la serie anterior.
+
+        Solo se descarga cuando la serie guardada no cubre el período pedido,
+        así que la nueva empieza antes y sigue siendo la de mayor rango.
+        """
+        self._series = {k: v for k, v in self._series.items() if not self._expired(v)}
+        self._series[key] = (period, frame, time.monotonic())
+
+    def _candidates(self, key):
+        """Claves guardadas con el mismo ticker e intervalo que ``key`` (primero ``key``)."""
+        ticker, _, interval = key
+        others = [k for k in self._series if k != key and k[0] == ticker and k[2] == interval]
+        return ([key] if key in self._series else []) + others
+
+    def get(self, key, period):
+        """Ventana de ``period`` sobre una serie guardada, o ``None`` si ninguna lo cubre.
+
+        El intervalo base de ``key`` depende del período (p. ej. 1h se deriva
+        de 5m para "1mo" pero se descarga tal cual para "1y"), así que también
+        sirven las series del mismo ticker e intervalo guardadas con otro base.
+        """
+        for stored_key in self._candidates(key):
+            stored = self._series[stored_key]
+            if self._expired(stored):
+                self.discard(stored_key)
+                continue
+            stored_period, frame, _ = stored
+            if covers(frame, stored_period, period):
+                return frame.window(period_start(frame, period))
+        return None
+
+    def discard(self, key):
+        """Elimina la serie guardada para ``key``, si existe."""
+        self._series.pop(key, None)
@@ -0,0 +1,300 @@
+"""Control de calidad vectorizado para series OHLCV.
+
+Detecta huecos de sesiones, rachas de NaN (p. ej. de la unión externa de
+varios tickers), barras con volumen cero, splits sin ajustar y valores
+atípicos, y opcionalmente los repara. Todas las comprobaciones trabajan
+directamente sobre los arreglos de ``OHLCVFrame`` sin bucles por barra.
+"""
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import (
+    AbstractHolidayCalendar,
+    GoodFriday,
+    Holiday,
+    USLaborDay,
+    USMartinLutherKingJr,
+    USMemorialDay,
+    USPresidentsDay,
+    USThanksgivingDay,
+    nearest_workday,
+    sunday_to_monday,
+)
+
+from ohlcv import OHLCVFrame
+
+# Campos OHLCV reconocidos en los nombres de columna (el más largo primero)
+FIELDS = ["Adj Close", "Open", "High", "Low", "Close", "Volume"]
+
+# Campos que un split deja sin ajustar ("Adj Close" ya viene ajustado)
+SPLIT_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Factores de split habituales (2:1, 3:1, ...). El 3:2 no se incluye: una
+# caída de un 33 % en un día es demasiado frecuente para atribuirla a un split
+SPLIT_FACTORS = np.array([2.0, 3.0, 4.0, 5.0, 8.0, 10.0, 15.0, 20.0])
+
+# Tolerancia relativa para reconocer un factor de split en el cociente de precios
+SPLIT_TOLERANCE = 0.03
+
+# Umbrales por defecto para valores atípicos
+DEFAULT_THRESHOLDS = {"mad": 6.0, "zscore": 4.0}
+
+# Tamaño de la muestra para estimar estadísticos globales (outliers, paso del índice)
+STATS_SAMPLE_SIZE = 200_000
+
+_DAY_NS = 86_400 * 10**9
+
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    """Festivos de la Bolsa de Nueva York (sin cierres extraordinarios)."""
+
+    rules = [
+        Holiday("Año Nuevo", month=1, day=1, observance=sunday_to_monday),
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday("Juneteenth", month=6, day=19, start_date="2022-01-01", observance=nearest_workday),
+        Holiday("Día de la Independencia", month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday("Navidad", month=12, day=25, observance=nearest_workday),
+    ]
+
+
+def split_field(name):
+    """Separa una columna en (campo, grupo): ``'Close AAPL'`` -> ``('Close', 'AAPL')``."""
+    lower = name.lower()
+    for field in FIELDS:
+        f = field.lower()
+        if lower == f:
+            return field, ""
+        if lower.startswith(f + " "):
+            return field, name[len(field) + 1:]
+        if lower.endswith(" " + f):
+            return field, name[:-len(field) - 1]
+    return None, name
+
+
+def _longest_run(mask):
+    """Longitud de la racha más larga de ``True`` en ``mask``."""
+    if not mask.any():
+        return 0
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return int((ends - starts).max())
+
+
+def _center_scale(changes, method):
+    """Centro y escala de ``changes`` estimados sobre una muestra aleatoria.
+
+    Con ``STATS_SAMPLE_SIZE`` cambios la estimación es estable y evita
+    ordenar la serie completa. Devuelve ``(None, None)`` si no hay datos.
+    """
+    sample = changes[1:]
+    if len(sample) > STATS_SAMPLE_SIZE:
+        rng = np.random.default_rng(0)
+        sample = sample[rng.integers(0, len(sample), STATS_SAMPLE_SIZE)]
+    sample = sample[np.isfinite(sample)]
+    if len(sample) == 0:
+        return None, None
+    if method == "mad":
+        center = np.median(sample)
+        return center, 1.4826 * np.median(np.abs(sample - center))
+    return sample.mean(), sample.std()
+
+
+def _outlier_mask(values, method, threshold):
+    """Marca como atípicos los cambios logarítmicos extremos de ``values``."""
+    if method not in DEFAULT_THRESHOLDS:
+        raise ValueError(f"Método de outliers no soportado: {method}")
+    if len(values) < 2:
+        return np.zeros(len(values), dtype=bool)
+    # float32 basta para los cambios relativos y reduce a la mitad el tráfico de memoria
+    logs = values.astype(np.float32)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        logs[~(logs > 0)] = np.nan
+        np.log(logs, out=logs)
+    changes = np.empty_like(logs)
+    changes[0] = np.nan
+    np.subtract(logs[1:], logs[:-1], out=changes[1:])
+    center, scale = _center_scale(changes, method)
+    if scale is None or not np.isfinite(scale) or scale == 0:
+        return np.zeros(len(values), dtype=bool)
+    # Desviación absoluta calculada en el mismo búfer, sin arreglos intermedios
+    np.subtract(changes, center, out=changes)
+    np.abs(changes, out=changes)
+    with np.errstate(invalid="ignore"):
+        return changes > threshold * scale
+
+
+def _detect_splits(close):
+    """Posiciones y factores de splits sin ajustar según el cociente de cierres.
+
+    Un factor mayor que 1 es un split (el precio cae a ``1/factor``); uno
+    menor que 1 es un contrasplit.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = close[1:].astype(np.float64) / close[:-1]
+    # Solo se examinan los saltos grandes; el resto no puede ser un split
+    candidates = np.flatnonzero((ratio < 0.7) | (ratio > 1.4))
+    if len(candidates) == 0:
+        return candidates, np.empty(0)
+    jump = ratio[candidates]
+    jump = np.where(jump < 1, 1 / jump, jump)
+    nearest = SPLIT_FACTORS[np.abs(jump[:, None] / SPLIT_FACTORS - 1).argmin(axis=1)]
+    matched = np.abs(jump / nearest - 1) < SPLIT_TOLERANCE
+    positions = candidates[matched] + 1
+    factors = np.where(ratio[candidates[matched]] < 1, nearest[matched], 1 / nearest[matched])
+    return positions, factors
+
+
+def _gap_mask(index):
+    """Marca las barras que siguen a una sesión (o barra intradía) ausente."""
+    mask = np.zeros(len(index), dtype=bool)
+    if len(index) < 3:
+        return mask
+    deltas = np.diff(index).astype(np.int64)
+    step = np.median(deltas[::max(1, len(deltas) // STATS_SAMPLE_SIZE)])
+    if _DAY_NS <= step < 2 * _DAY_NS:
+        # Datos diarios: sesiones hábiles (sin festivos de NYSE) entre barras consecutivas
+        days = index.astype("datetime64[D]")
+        valid = ~np.isnat(days[:-1]) & ~np.isnat(days[1:])
+        if valid.any():
+            holidays = NYSEHolidayCalendar().holidays(
+                start=pd.Timestamp(days[~np.isnat(days)].min()),
+                end=pd.Timestamp(days[~np.isnat(days)].max()),
+            ).values.astype("datetime64[D]")
+            missing = np.busday_count(days[:-1][valid] + 1, days[1:][valid], holidays=holidays)
+            mask[1:][valid] = missing > 0
+    elif step >= 2 * _DAY_NS:
+        # Barras semanales o mensuales: huecos claramente mayores que el paso
+        mask[1:] = deltas > 1.5 * step
+    else:
+        # Datos intradía: solo cuentan los huecos dentro de la misma sesión
+        days = index.astype("datetime64[D]")
+        mask[1:] = (days[1:] == days[:-1]) & (deltas > 1.5 * step)
+    return mask
+
+
+class QualityReport:
+    """Resultado de ``check_quality``: máscaras por columna y splits por grupo."""
+
+    def __init__(self, gaps, nan_masks, outlier_masks, zero_volume, splits):
+        self.gaps = gaps
+        self.nan_masks = nan_masks
+        self.outlier_masks = outlier_masks
+        self.zero_volume = zero_volume
+        self.splits = splits
+
+    def has_issues(self):
+        return bool(
+            self.gaps.any()
+            or any(mask.any() for mask in self.nan_masks.values())
+            or any(mask.any() for mask in self.outlier_masks.values())
+            or any(mask.any() for mask in self.zero_volume.values())
+            or any(len(positions) for positions, _ in self.splits.values())
+        )
+
+    def summary(self):
+        """Tabla resumen por columna para mostrar en la interfaz."""
+        rows = []
+        for name, nan_mask in self.nan_masks.items():
+            field, group = split_field(name)
+            # Solo se cuentan donde "Ajustar splits" actúa (no en "Adj Close")
+            has_splits = field in SPLIT_FIELDS and group in self.splits
+            zero = self.zero_volume.get(name)
+            rows.append({
+                "Columna": name,
+                "NaN": int(nan_mask.sum()),
+                "Racha NaN máx.": _longest_run(nan_mask),
+                "Outliers": int(self.outlier_masks[name].sum()),
+                "Volumen cero": int(zero.sum()) if zero is not None else 0,
+                "Splits": len(self.splits[group][0]) if has_splits else 0,
+            })
+        summary = pd.DataFrame(rows)
+        summary.attrs["huecos"] = int(self.gaps.sum())
+        return summary
+
+
+def check_quality(frame, method="mad", threshold=None):
+    """Analiza ``frame`` y devuelve un ``QualityReport``.
+
+    ``method`` es ``"mad"`` (desviación absoluta mediana, robusta) o
+    ``"zscore"``; los atípicos se buscan sobre los cambios logarítmicos de
+    cada columna numérica. Los saltos reconocidos como split no se cuentan
+    como atípicos.
+    """
+    if method not in DEFAULT_THRESHOLDS:
+        raise ValueError(f"Método de outliers no soportado: {method}")
+    if threshold is None:
+        threshold = DEFAULT_THRESHOLDS[method]
+
+    numeric = {name: values for name, values in frame.columns.items() if values.dtype.kind in "fiu"}
+
+    splits = {}
+    for name, values in numeric.items():
+        field, group = split_field(name)
+        if field == "Close":
+            splits[group] = _detect_splits(values)
+
+    nan_masks = {}
+    outlier_masks = {}
+    zero_volume = {}
+    for name, values in numeric.items():
+        field, group = split_field(name)
+        nan_masks[name] = np.isnan(values) if values.dtype.kind == "f" else np.zeros(len(values), dtype=bool)
+        mask = _outlier_mask(values, method, threshold)
+        if group in splits and field != "Volume":
+            mask[splits[group][0]] = False
+        outlier_masks[name] = mask
+        if field == "Volume":
+            zero_volume[name] = values == 0
+
+    return QualityReport(_gap_mask(frame.index), nan_masks, outlier_masks, zero_volume, splits)
+
+
+def _ffill(values):
+    """Forward-fill vectorizado de los NaN de ``values``."""
+    mask = np.isnan(values)
+    if not mask.any():
+        return values
+    positions = np.where(mask, 0, np.arange(len(values)))
+    np.maximum.accumulate(positions, out=positions)
+    return values[positions]
+
+
+def repair(frame, report, fill=True, adjust_splits=True):
+    """Devuelve una copia reparada de ``frame`` según ``report``.
+
+    ``fill`` aplica forward-fill a los NaN de precios (los NaN iniciales se
+    mantienen); ``adjust_splits`` divide los precios anteriores a cada split
+    por su factor y multiplica el volumen, como hace Yahoo. ``Adj Close`` no
+    se toca porque ya viene ajustado.
+    """
+    columns = dict(frame.columns)
+
+    if adjust_splits:
+        n = len(frame)
+        for group, (positions, factors) in report.splits.items():
+            if len(positions) == 0:
+                continue
+            # Factor acumulado de todos los splits posteriores a cada barra
+            step = np.ones(n)
+            step[positions] = factors
+            after = np.append(np.cumprod(step[::-1])[::-1][1:], 1.0)
+            for name, values in frame.columns.items():
+                field, col_group = split_field(name)
+                if col_group != group or field not in SPLIT_FIELDS:
+                    continue
+                if field == "Volume":
+                    columns[name] = np.rint(values * after).astype(values.dtype)
+                else:
+                    columns[name] = (values / after).astype(values.dtype)
+
+    if fill:
+        for name, values in columns.items():
+            if values.dtype.kind == "f" and report.nan_masks.get(name, np.empty(0)).any():
+                columns[name] = _ffill(values)
+
+    return OHLCVFrame(frame.index, columns, index_name=frame.index_name, tz=frame.tz)
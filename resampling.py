@@ -0,0 +1,188 @@
+"""Motor de remuestreo OHLCV.
+
+Construye barras de 5m/15m/1h/1d/1wk/1mo a partir de barras más finas ya
+descargadas, de modo que una sola serie de grano fino sirva para todas las
+selecciones de intervalo sin volver a llamar a Yahoo Finanzas.
+"""
+import pandas as pd
+
+# Duración de cada intervalo intradía en minutos
+INTRADAY_MINUTES = {
+    "1m": 1,
+    "2m": 2,
+    "5m": 5,
+    "15m": 15,
+    "30m": 30,
+    "60m": 60,
+    "90m": 90,
+    "1h": 60,
+}
+
+# Intervalos de calendario (se agrupan por sesión, no por minutos)
+CALENDAR_INTERVALS = ["1d", "5d", "1wk", "1mo", "3mo"]
+
+# Días máximos de historia que Yahoo sirve para cada intervalo intradía
+YAHOO_INTRADAY_LIMIT_DAYS = {
+    "1m": 7,
+    "2m": 60,
+    "5m": 60,
+    "15m": 60,
+    "30m": 60,
+    "60m": 730,
+    "90m": 60,
+    "1h": 730,
+}
+
+# Duración aproximada de cada período de Yahoo en días
+PERIOD_DAYS = {
+    "1d": 1,
+    "5d": 5,
+    "1mo": 31,
+    "3mo": 92,
+    "6mo": 183,
+    "1y": 366,
+    "2y": 730,
+    "5y": 1827,
+    "10y": 3653,
+    "ytd": 366,
+    "max": float("inf"),
+}
+
+# Intervalos base que se descargan, del más fino al más grueso
+BASE_INTERVALS = ["1m", "5m", "1h", "1d"]
+
+# Regla de agregación por campo OHLCV
+OHLCV_AGG = {
+    "Open": "first",
+    "High": "max",
+    "Low": "min",
+    "Close": "last",
+    "Adj Close": "last",
+    "Volume": "sum",
+}
+
+# Apertura de la sesión regular (hora local de la bolsa)
+SESSION_OPEN = "9h30min"
+
+
+def is_intraday(interval):
+    return interval in INTRADAY_MINUTES
+
+
+def is_available(interval, period):
+    """Indica si Yahoo sirve ``interval`` para ``period``."""
+    if not is_intraday(interval):
+        return True
+    return PERIOD_DAYS[period] <= YAHOO_INTRADAY_LIMIT_DAYS[interval]
+
+
+def plan_intervals(period, interval):
+    """Decide qué intervalo descargar y cuál mostrar.
+
+    Devuelve ``(fetch_interval, target_interval)``. Los intervalos de
+    calendario se derivan de las barras diarias oficiales de Yahoo (cierre
+    y volumen oficiales). Para los intradía se descarga el intervalo base
+    más fino disponible para el período y el pedido se deriva localmente
+    cuando es múltiplo de ese base. Si el intervalo pedido no puede
+    servirse se devuelve el más cercano posible.
+    """
+    if not is_intraday(interval):
+        return "1d", interval
+
+    base = next(b for b in BASE_INTERVALS if is_available(b, period))
+    if not is_intraday(base):
+        # Período demasiado largo para cualquier dato intradía
+        return base, base
+
+    minutes = INTRADAY_MINUTES[interval]
+    base_minutes = INTRADAY_MINUTES[base]
+    if minutes % base_minutes == 0:
+        return base, interval
+    if is_available(interval, period):
+        # Intervalo no derivable del base (p. ej. 2m sobre 5m): se descarga tal cual
+        return interval, interval
+    return base, base
+
+
+def _field(column):
+    """Nombre del campo OHLCV de una columna simple o multiíndice."""
+    if isinstance(column, tuple):
+        for level in column:
+            if level in OHLCV_AGG:
+                return level
+        return None
+    return column if column in OHLCV_AGG else None
+
+
+def _aggregation(data):
+    agg = {}
+    for col in data.columns:
+        field = _field(col)
+        # Columnas desconocidas conservan el último valor del intervalo
+        agg[col] = OHLCV_AGG[field] if field else "last"
+    return agg
+
+
+def _session_dates(index):
+    """Fecha de sesión (medianoche local) de cada barra."""
+    return index.normalize()
+
+
+def _intraday_labels(index, minutes):
+    """Inicio del intervalo intradía de cada barra, medido desde la apertura.
+
+    Los intervalos se cuentan en hora local desde la apertura de cada
+    sesión, de modo que un cambio de horario (DST) no desplaza la rejilla:
+    con 90m las barras empiezan siempre a las 9:30, 11:00, 12:30, ...
+    """
+    tz = getattr(index, "tz", None)
+    local = index.tz_localize(None) if tz is not None else index
+    opens = local.normalize() + pd.Timedelta(SESSION_OPEN)
+    rule = pd.Timedelta(minutes=minutes)
+    labels = opens + ((local - opens) // rule) * rule
+    if tz is not None:
+        labels = labels.tz_localize(tz, ambiguous="NaT", nonexistent="shift_forward")
+    return labels
+
+
+def resample_ohlcv(data, interval):
+    """Remuestrea ``data`` (índice temporal, columnas OHLCV) a ``interval``.
+
+    Acepta columnas simples (``Close``) o el multiíndice de ``yf.download``
+    (``('Close', 'AAPL')`` o ``('AAPL', 'Close')``). Las barras intradía se
+    alinean con la apertura de la sesión regular y las de calendario se
+    agrupan por sesión bursátil; los intervalos sin operaciones se descartan.
+    """
+    if data.empty:
+        return data
+
+    agg = _aggregation(data)
+    index = data.index
+
+    if is_intraday(interval):
+        grouped = data.groupby(_intraday_labels(index, INTRADAY_MINUTES[interval]))
+    elif interval == "1d":
+        grouped = data.groupby(_session_dates(index))
+    elif interval == "5d":
+        # Bloques de cinco sesiones consecutivas, etiquetados por la primera
+        sessions = _session_dates(index)
+        codes, uniques = pd.factorize(sessions)
+        block = codes // 5
+        labels = uniques[(block * 5)]
+        grouped = data.groupby(labels)
+    elif interval == "1wk":
+        grouped = data.resample("W-MON", label="left", closed="left")
+    elif interval == "1mo":
+        grouped = data.resample("MS")
+    elif interval == "3mo":
+        grouped = data.resample("QS")
+    else:
+        raise ValueError(f"Intervalo no soportado: {interval}")
+
+    result = grouped.agg(agg)
+    # Quitar intervalos vacíos (fuera de sesión, fines de semana, festivos)
+    price_cols = [col for col in data.columns if _field(col) not in (None, "Volume")]
+    if price_cols:
+        result = result.dropna(subset=price_cols, how="all")
+    result.index.name = index.name
+    return result
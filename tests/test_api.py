@@ -0,0 +1,207 @@
+"""Pruebas del servicio HTTP (sin red)."""
+import gzip
+import io
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from api import (  # noqa: E402
+    ARROW_MIME,
+    AnalysisService,
+    ResponseCache,
+    StubUpstream,
+    YahooUpstream,
+    make_handler,
+)
+
+
+class CountingUpstream(StubUpstream):
+    """Stub que cuenta las descargas realizadas."""
+
+    def __init__(self, latency=0.0):
+        super().__init__(latency)
+        self.calls = 0
+        self._calls_lock = threading.Lock()
+
+    def fetch(self, ticker, period, interval):
+        with self._calls_lock:
+            self.calls += 1
+        return super().fetch(ticker, period, interval)
+
+
+@pytest.fixture
+def server():
+    upstream = CountingUpstream()
+    service = AnalysisService(upstream)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(service, ResponseCache()))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.upstream = upstream
+    httpd.base_url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _get(server, path, headers=None):
+    """Devuelve ``(status, cabeceras, cuerpo)`` de ``GET path``."""
+    request = urllib.request.Request(server.base_url + path, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def test_upstream_session_se_construye_sin_red():
+    # Crear la sesión no abre conexiones: valida los argumentos del constructor
+    try:
+        import curl_cffi.requests as curl_requests
+    except ImportError:
+        curl_requests = None
+        pytest.importorskip("requests")
+
+    upstream = YahooUpstream()
+    session = upstream.session()
+    if curl_requests is not None:
+        assert isinstance(session, curl_requests.Session)
+    assert upstream.session() is session
+
+
+def test_stub_upstream_determinista():
+    stub = StubUpstream()
+    first = stub.fetch("AAPL", "1mo", "1d")
+    second = stub.fetch("AAPL", "1mo", "1d")
+    pd.testing.assert_frame_equal(first, second)
+    assert list(first.columns.get_level_values(0)) == ["Close", "High", "Low", "Open", "Volume"]
+    assert not first.equals(stub.fetch("MSFT", "1mo", "1d"))
+
+
+def test_ohlcv_json_y_etag(server):
+    status, headers, body = _get(server, "/ohlcv?ticker=aapl&period=1mo&interval=1d")
+    assert status == 200
+    assert headers["Content-Type"] == "application/json"
+    payload = json.loads(body)
+    assert payload["columns"][0] == "Date"
+    assert len(payload["data"]) > 15
+
+    etag = headers["ETag"]
+    status, headers, body = _get(server, "/ohlcv?ticker=aapl&period=1mo&interval=1d",
+                                 {"If-None-Match": etag})
+    assert status == 304
+    assert headers["ETag"] == etag
+    assert body == b""
+
+
+def test_periodo_mas_corto_sin_nueva_descarga(server):
+    assert _get(server, "/stats?ticker=AAPL&period=1y&interval=1d")[0] == 200
+    assert _get(server, "/stats?ticker=AAPL&period=3mo&interval=1d")[0] == 200
+    assert server.upstream.calls == 1
+
+
+def test_periodo_mas_corto_con_otro_intervalo_base(server):
+    # 1h se descarga tal cual para "1y" y se derivaría de 5m para "1mo"
+    assert _get(server, "/stats?ticker=AAPL&period=1y&interval=1h")[0] == 200
+    assert _get(server, "/stats?ticker=AAPL&period=1mo&interval=1h")[0] == 200
+    assert server.upstream.calls == 1
+
+
+def test_gzip(server):
+    path = "/ohlcv?ticker=AAPL&period=1y&interval=1d"
+    _, _, plain = _get(server, path)
+    status, headers, body = _get(server, path, {"Accept-Encoding": "gzip"})
+    assert status == 200
+    assert headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(body) == plain
+    assert len(body) < len(plain)
+
+
+def test_arrow(server):
+    pa = pytest.importorskip("pyarrow")
+    status, headers, body = _get(server, "/ohlcv?ticker=AAPL&period=1mo&interval=1d&format=arrow")
+    assert status == 200
+    assert headers["Content-Type"] == ARROW_MIME
+    table = pa.ipc.open_stream(io.BytesIO(body)).read_all()
+    assert "Close AAPL" in table.column_names
+
+    status, headers, _ = _get(server, "/indicators?ticker=AAPL&period=1mo&interval=1d",
+                              {"Accept": ARROW_MIME})
+    assert headers["Content-Type"] == ARROW_MIME
+
+
+def test_accept_arrow_en_ruta_solo_json(server):
+    status, headers, _ = _get(server, "/stats?ticker=AAPL&period=1mo&interval=1d", {"Accept": ARROW_MIME})
+    assert status == 200
+    assert headers["Content-Type"] == "application/json"
+
+
+@pytest.mark.parametrize("path", [
+    "/ohlcv?ticker=AAPL&format=xml",
+    "/stats?ticker=AAPL&format=arrow",
+    "/export?ticker=AAPL&format=json",
+])
+def test_formato_no_soportado(server, path):
+    status, headers, body = _get(server, path)
+    assert status == 400
+    assert "error" in json.loads(body)
+    assert server.upstream.calls == 0
+
+
+def test_export_csv(server):
+    status, headers, body = _get(server, "/export?ticker=AAPL&period=1mo&interval=1d")
+    assert status == 200
+    assert headers["Content-Type"] == "text/csv"
+    assert 'filename="AAPL.csv"' in headers["Content-Disposition"]
+    assert body.decode("utf-8").splitlines()[0].startswith("Date,")
+
+
+def test_errores_de_peticion(server):
+    assert _get(server, "/desconocida?ticker=AAPL")[0] == 404
+    assert _get(server, "/ohlcv")[0] == 400
+    assert _get(server, "/ohlcv?ticker=AAPL&period=7y")[0] == 400
+    assert _get(server, "/indicators?ticker=AAPL&window=abc")[0] == 400
+    assert _get(server, "/ohlcv?ticker=AAPL&start=no-es-fecha")[0] == 400
+
+
+def test_una_sola_descarga_por_serie():
+    upstream = CountingUpstream(latency=0.2)
+    service = AnalysisService(upstream)
+    results = []
+
+    def worker():
+        results.append(len(service.series("AAPL", "1mo", "1d")))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert upstream.calls == 1
+    assert len(set(results)) == 1
+    # Los candados por serie no se acumulan
+    assert service._key_locks == {}
+
+
+def test_descargas_de_series_distintas_en_paralelo():
+    upstream = CountingUpstream(latency=0.2)
+    service = AnalysisService(upstream)
+    threads = [threading.Thread(target=service.series, args=(ticker, "1mo", "1d"))
+               for ticker in ("AAPL", "MSFT", "NVDA", "TSLA")]
+    t0 = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Con un candado global las cuatro descargas tardarían 0.8 s
+    assert time.perf_counter() - t0 < 0.6
+    assert upstream.calls == 4
+    assert service._key_locks == {}
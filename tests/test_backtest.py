@@ -0,0 +1,140 @@
+"""Pruebas del backtest vectorizado de portafolios."""
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from backtest import (  # noqa: E402
+    _ffill_2d,
+    price_matrix,
+    rebalance_mask,
+    signal_matrix,
+    simulate,
+    sweep,
+)
+from ohlcv import OHLCVFrame  # noqa: E402
+
+
+def _market(n=300, assets=3, seed=0):
+    """Precios diarios con un activo que empieza a cotizar tarde y un NaN intermedio."""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2023-01-02", periods=n).to_numpy(dtype="datetime64[ns]")
+    prices = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, (n, assets)), axis=0))
+    prices[:80, -1] = np.nan
+    prices[150, 0] = np.nan
+    return prices, index
+
+
+def _reference(prices, index, weights, frequency, rule, window, cost_bps):
+    """Simulación barra a barra con unidades y efectivo explícitos."""
+    weights = np.asarray(weights, dtype=float) / np.sum(weights)
+    prices = _ffill_2d(prices)
+    signals = signal_matrix(prices, rule, window)
+    rebalance = rebalance_mask(index, frequency)
+    units = np.zeros(prices.shape[1])
+    cash = 1.0
+    equity = np.empty(len(prices))
+    for t in range(len(prices)):
+        p = prices[t]
+        held = np.where(units > 0, units * np.nan_to_num(p), 0.0)
+        value = cash + held.sum()
+        changed = t > 0 and (signals[t] != signals[t - 1]).any()
+        if rebalance[t] or changed:
+            target = weights * signals[t] * np.isfinite(p)
+            turnover = np.abs(target - held / value).sum()
+            value *= 1 - turnover * cost_bps / 10_000
+            units = np.where(target > 0, target * value / np.where(np.isfinite(p), p, 1.0), 0.0)
+            cash = value * (1 - target.sum())
+        equity[t] = value
+    return equity
+
+
+@pytest.mark.parametrize("frequency", ["none", "D", "W", "M", "Q"])
+@pytest.mark.parametrize("rule", ["none", "sma", "momentum"])
+def test_simulate_coincide_con_la_referencia(frequency, rule):
+    prices, index = _market()
+    weights = [0.5, 0.3, 0.2]
+    result = simulate(prices, index, weights, frequency, rule, window=20, cost_bps=10)
+    expected = _reference(prices, index, weights, frequency, rule, window=20, cost_bps=10)
+    np.testing.assert_allclose(result["equity"], expected, rtol=1e-12)
+    assert result["total_return"] == pytest.approx(expected[-1] - 1)
+    assert result["max_drawdown"] <= 0
+
+
+def test_sin_costes_ni_rebalanceo_es_comprar_y_mantener():
+    prices, index = _market()
+    prices = _ffill_2d(prices[:, :2])
+    result = simulate(prices, index, [1, 1], "none")
+    expected = 0.5 * prices[:, 0] / prices[0, 0] + 0.5 * prices[:, 1] / prices[0, 1]
+    np.testing.assert_allclose(result["equity"], expected, rtol=1e-12)
+    assert result["rebalances"] == 1
+
+
+def _naive_signals(prices, rule, window):
+    n, assets = prices.shape
+    active = np.zeros(prices.shape, dtype=bool)
+    for j in range(assets):
+        valid = np.flatnonzero(np.isfinite(prices[:, j]))
+        first = valid[0] if len(valid) else n
+        for t in range(n):
+            last = t - 1
+            if rule == "sma" and last - first + 1 >= window:
+                active[t, j] = prices[last, j] > prices[last - window + 1:last + 1, j].mean()
+            if rule == "momentum" and last - first >= window:
+                active[t, j] = prices[last, j] > prices[last - window, j]
+    return active
+
+
+@pytest.mark.parametrize("rule", ["sma", "momentum"])
+def test_signal_matrix_tras_historia_propia(rule):
+    prices, _ = _market()
+    prices = _ffill_2d(prices)
+    signals = signal_matrix(prices, rule, window=20)
+    np.testing.assert_array_equal(signals, _naive_signals(prices, rule, 20))
+    # El activo que cotiza desde la barra 80 no se activa antes de tener 20 precios propios
+    assert not signals[:100, -1].any()
+
+
+def test_signal_matrix_regla_desconocida():
+    prices, _ = _market()
+    with pytest.raises(ValueError):
+        signal_matrix(prices, "rsi", window=20)
+
+
+def test_rebalance_mask():
+    index = pd.bdate_range("2024-01-01", "2024-03-29").to_numpy(dtype="datetime64[ns]")
+    dates = pd.DatetimeIndex(index)
+    weekly = rebalance_mask(index, "W")
+    assert (dates[weekly].dayofweek == 0).all()
+    monthly = rebalance_mask(index, "M")
+    assert list(dates[monthly].strftime("%Y-%m-%d")) == ["2024-01-01", "2024-02-01", "2024-03-01"]
+    assert rebalance_mask(index, "Q").sum() == 1
+    assert rebalance_mask(index, "none").sum() == 1
+    with pytest.raises(ValueError):
+        rebalance_mask(index, "Y")
+
+
+def test_price_matrix():
+    index = pd.bdate_range("2024-01-01", periods=3).to_numpy(dtype="datetime64[ns]")
+    frame = OHLCVFrame(index, {
+        "Close AAPL": np.array([1.0, 2.0, 3.0], dtype=np.float32),
+        "Close MSFT": np.array([4.0, 5.0, 6.0]),
+        "Volume AAPL": np.array([1, 2, 3]),
+    })
+    prices, found = price_matrix(frame, ["MSFT", "AAPL", "NVDA"])
+    assert found == ["MSFT", "AAPL"]
+    assert prices.dtype == np.float64
+    assert prices[:, 1].tolist() == [1.0, 2.0, 3.0]
+
+    single = OHLCVFrame(index, {"Close": np.array([1.0, 2.0, 3.0])})
+    assert price_matrix(single, ["AAPL"])[1] == ["AAPL"]
+
+
+def test_sweep_en_paralelo_igual_que_secuencial():
+    prices, index = _market(n=200)
+    weights = np.random.default_rng(1).dirichlet(np.ones(3), size=4)
+    sequential = sweep(prices, index, weights, ["none", "M"], max_workers=1)
+    parallel = sweep(prices, index, weights, ["none", "M"], max_workers=2)
+    assert len(sequential) == 8
+    pd.testing.assert_frame_equal(sequential, parallel)
+    assert sequential["sharpe"].is_monotonic_decreasing
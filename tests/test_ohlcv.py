@@ -0,0 +1,110 @@
+"""Pruebas del contenedor OHLCV compacto."""
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from ohlcv import COMPACT_PRICE_DTYPE, OHLCVFrame  # noqa: E402
+
+
+def _download(rows=10, tz="America/New_York"):
+    """DataFrame con el formato multiíndice de ``yf.download``."""
+    index = pd.date_range("2024-01-02 09:30", periods=rows, freq="1h", tz=tz, name="Datetime")
+    close = np.linspace(100, 110, rows)
+    data = pd.DataFrame({
+        ("Close", "AAPL"): close,
+        ("High", "AAPL"): close + 1,
+        ("Low", "AAPL"): close - 1,
+        ("Open", "AAPL"): close,
+        ("Volume", "AAPL"): np.arange(rows, dtype=np.int64) * 100,
+    }, index=index)
+    data.columns.names = ["Price", "Ticker"]
+    return data
+
+
+def test_from_download_aplana_y_compacta():
+    frame = OHLCVFrame.from_download(_download())
+    assert list(frame.columns) == ["Close AAPL", "High AAPL", "Low AAPL", "Open AAPL", "Volume AAPL"]
+    assert frame.columns["Close AAPL"].dtype == np.float64
+    assert frame.columns["Volume AAPL"].dtype == np.int64
+    assert frame.index.dtype == np.dtype("datetime64[ns]")
+    assert all(values.flags["C_CONTIGUOUS"] for values in frame.columns.values())
+    assert str(frame.tz) == "America/New_York"
+    assert frame.dates()[0] == pd.Timestamp("2024-01-02 09:30", tz="America/New_York")
+
+
+def test_volumen_con_nan_se_conserva_como_float():
+    data = _download()
+    volume = data[("Volume", "AAPL")].astype(float)
+    volume.iloc[3] = np.nan
+    data[("Volume", "AAPL")] = volume
+    values = OHLCVFrame.from_download(data).columns["Volume AAPL"]
+    assert values.dtype == np.float64
+    assert np.isnan(values[3])
+
+
+def test_volumen_fraccionario_no_se_trunca():
+    df = pd.DataFrame({"Date": pd.date_range("2024-01-01", periods=3), "Volume": [1.5, 2.0, 0.25]})
+    values = OHLCVFrame.from_dataframe(df, "Date").columns["Volume"]
+    assert values.dtype == np.float64
+    assert values.tolist() == [1.5, 2.0, 0.25]
+
+
+def test_volumen_float_entero_se_compacta():
+    df = pd.DataFrame({"Date": pd.date_range("2024-01-01", periods=3), "Volume": [1.0, 2.0, 3.0]})
+    values = OHLCVFrame.from_dataframe(df, "Date").columns["Volume"]
+    assert values.dtype == np.int64
+    assert values.tolist() == [1, 2, 3]
+
+
+def test_from_dataframe_ordena_y_conserva_texto():
+    df = pd.DataFrame({
+        "Date": ["2024-01-03", "2024-01-01", "2024-01-02"],
+        "Close": [3.0, 1.0, 2.0],
+        "Nota": ["c", "a", "b"],
+    })
+    frame = OHLCVFrame.from_dataframe(df, "Date")
+    assert frame.columns["Close"].tolist() == [1.0, 2.0, 3.0]
+    assert frame.columns["Nota"].tolist() == ["a", "b", "c"]
+
+
+def test_window_es_una_vista():
+    frame = OHLCVFrame.from_download(_download())
+    window = frame.window("2024-01-02 11:30", "2024-01-02 14:30")
+    assert len(window) == 4
+    assert window.dates()[0] == pd.Timestamp("2024-01-02 11:30", tz="America/New_York")
+    for name, values in window.columns.items():
+        assert np.shares_memory(values, frame.columns[name])
+    assert np.shares_memory(window.index, frame.index)
+
+
+def test_window_con_fechas_con_zona_horaria():
+    frame = OHLCVFrame.from_download(_download())
+    window = frame.window(pd.Timestamp("2024-01-02 16:30", tz="UTC"))
+    assert window.dates()[0] == pd.Timestamp("2024-01-02 11:30", tz="America/New_York")
+
+
+def test_to_frame_sin_copia():
+    frame = OHLCVFrame.from_download(_download())
+    df = frame.to_frame()
+    assert df.columns[0] == "Datetime"
+    assert np.shares_memory(df["Close AAPL"].to_numpy(), frame.columns["Close AAPL"])
+
+
+def test_precios_float32_reducen_la_memoria():
+    data = _download(rows=1000)
+    full = OHLCVFrame.from_download(data)
+    compact = OHLCVFrame.from_download(data, COMPACT_PRICE_DTYPE)
+    assert compact.columns["Close AAPL"].dtype == np.float32
+    assert compact.columns["Volume AAPL"].dtype == np.int64
+    assert compact.nbytes(np.float64) == full.nbytes()
+    # Cuatro columnas de precio a la mitad; índice y volumen sin cambios
+    assert full.nbytes() - compact.nbytes() == 4 * 1000 * 4
+
+
+def test_astype_prices():
+    frame = OHLCVFrame.from_download(_download())
+    assert frame.astype_prices(np.float64) is frame
+    compact = frame.astype_prices(COMPACT_PRICE_DTYPE)
+    assert compact.columns["Close AAPL"].dtype == np.float32
+    assert compact.columns["Volume AAPL"] is frame.columns["Volume AAPL"]
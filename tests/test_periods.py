@@ -0,0 +1,110 @@
+"""Pruebas del índice de períodos sobre series descargadas."""
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+import periods  # noqa: E402
+from ohlcv import OHLCVFrame  # noqa: E402
+from periods import SeriesStore, covers, period_start  # noqa: E402
+
+
+def _daily(start, end):
+    """Serie diaria de días hábiles entre ``start`` y ``end``."""
+    index = pd.bdate_range(start, end)
+    close = np.arange(len(index), dtype=float)
+    return OHLCVFrame(index.to_numpy(dtype="datetime64[ns]"), {"Close": close})
+
+
+def _intraday(start, end, tz="America/New_York"):
+    """Serie horaria de la sesión regular entre ``start`` y ``end``."""
+    sessions = pd.bdate_range(start, end)
+    offsets = pd.to_timedelta(np.arange(570, 960, 60), unit="min")
+    index = pd.DatetimeIndex((sessions.values[:, None] + offsets.values[None, :]).ravel())
+    index = index.tz_localize(tz).tz_convert("UTC").tz_localize(None)
+    return OHLCVFrame(index.to_numpy(dtype="datetime64[ns]"), {"Close": np.ones(len(index))},
+                      index_name="Datetime", tz=tz)
+
+
+def test_period_start():
+    frame = _daily("2023-01-02", "2025-02-14")
+    assert period_start(frame, "ytd") == pd.Timestamp("2025-01-01")
+    assert period_start(frame, "1y") == pd.Timestamp("2024-02-14")
+    assert period_start(frame, "5d") == pd.Timestamp("2025-02-10")
+    assert period_start(frame, "1d") == pd.Timestamp("2025-02-14")
+    assert period_start(frame, "max") is None
+
+
+def test_ytd_no_cubre_un_anio():
+    # En febrero "ytd" y "1y" miden lo mismo nominalmente pero no empiezan igual
+    frame = _daily("2025-01-02", "2025-02-14")
+    assert not covers(frame, "ytd", "1y")
+    assert covers(frame, "ytd", "1mo")
+    assert covers(_daily("2024-02-14", "2025-02-14"), "1y", "ytd")
+
+
+def test_activo_recien_listado():
+    # Cotiza desde septiembre: la descarga de "1y" empieza en su primera barra
+    frame = _daily("2025-09-01", "2025-12-31")
+    assert covers(frame, "1y", "6mo")
+    assert covers(frame, "1y", "ytd")
+    assert covers(frame, "1y", "5d")
+    assert not covers(frame, "1y", "2y")
+    assert not covers(frame, "6mo", "1y")
+
+
+def test_periodos_de_sesiones():
+    frame = _intraday("2025-02-03", "2025-02-14")
+    assert covers(frame, "1mo", "5d")
+    assert covers(frame, "1mo", "1d")
+    assert covers(frame, "5d", "1d")
+    assert not covers(frame, "1d", "5d")
+    assert not covers(frame, "5d", "1mo")
+    store = SeriesStore()
+    store.put(("AAPL", "1m", "5m"), "1mo", frame)
+    sessions = store.get(("AAPL", "1m", "5m"), "5d").dates().normalize().unique()
+    assert len(sessions) == 5
+    assert sessions[0] == pd.Timestamp("2025-02-10", tz="America/New_York")
+
+
+def test_store_ventana_sin_copia():
+    frame = _daily("2023-01-02", "2025-02-14")
+    store = SeriesStore()
+    store.put(("AAPL", "1d", "1d"), "2y", frame)
+    window = store.get(("AAPL", "1d", "1d"), "1mo")
+    assert window.dates()[0] >= pd.Timestamp("2025-01-14")
+    assert np.shares_memory(window.columns["Close"], frame.columns["Close"])
+    assert store.get(("AAPL", "1d", "1d"), "5y") is None
+    assert store.get(("MSFT", "1d", "1d"), "1mo") is None
+
+
+def test_store_otro_intervalo_base():
+    # 1h para "1y" se descarga tal cual; para "1mo" se derivaría de 5m
+    frame = _intraday("2024-02-14", "2025-02-14")
+    store = SeriesStore()
+    store.put(("AAPL", "1h", "1h"), "1y", frame)
+    window = store.get(("AAPL", "5m", "1h"), "1mo")
+    assert window is not None
+    assert window.dates()[0] >= pd.Timestamp("2025-01-14", tz="America/New_York")
+    assert store.get(("AAPL", "5m", "15m"), "1mo") is None
+
+
+def test_store_caducidad(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(periods.time, "monotonic", lambda: now[0])
+    store = SeriesStore(ttl=60)
+    store.put(("AAPL", "1d", "1d"), "1y", _daily("2024-02-14", "2025-02-14"))
+    assert store.get(("AAPL", "1d", "1d"), "1mo") is not None
+    now[0] += 61
+    assert store.get(("AAPL", "1d", "1d"), "1mo") is None
+    assert store._series == {}
+
+
+def test_store_elimina_caducadas_al_guardar(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(periods.time, "monotonic", lambda: now[0])
+    store = SeriesStore(ttl=60)
+    store.put(("AAPL", "1d", "1d"), "1y", _daily("2024-02-14", "2025-02-14"))
+    now[0] += 61
+    store.put(("MSFT", "1d", "1d"), "1y", _daily("2024-02-14", "2025-02-14"))
+    assert list(store._series) == [("MSFT", "1d", "1d")]
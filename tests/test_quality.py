@@ -0,0 +1,157 @@
+"""Pruebas del control de calidad de series OHLCV."""
+import warnings
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from ohlcv import OHLCVFrame  # noqa: E402
+from quality import _gap_mask, check_quality, repair, split_field  # noqa: E402
+
+
+def _index(dates):
+    return pd.DatetimeIndex(dates).to_numpy(dtype="datetime64[ns]")
+
+
+def _frame(close, volume=None, adj_close=None, start="2024-01-02"):
+    """Serie diaria de días hábiles con el formato aplanado de la app."""
+    close = np.asarray(close, dtype=float)
+    index = pd.bdate_range(start, periods=len(close))
+    columns = {
+        "Open AAPL": close.copy(),
+        "High AAPL": close * 1.01,
+        "Low AAPL": close * 0.99,
+        "Close AAPL": close,
+        "Volume AAPL": np.asarray(volume if volume is not None else np.full(len(close), 1000), dtype=np.int64),
+    }
+    if adj_close is not None:
+        columns["Adj Close AAPL"] = np.asarray(adj_close, dtype=float)
+    return OHLCVFrame(index.to_numpy(dtype="datetime64[ns]"), columns)
+
+
+def _walk(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+
+
+def test_split_field():
+    assert split_field("Close AAPL") == ("Close", "AAPL")
+    assert split_field("AAPL Adj Close") == ("Adj Close", "AAPL")
+    assert split_field("Volume") == ("Volume", "")
+    assert split_field("Nota") == (None, "Nota")
+
+
+def test_huecos_diarios_respetan_festivos():
+    # 2024-01-15 es Martin Luther King: no es un hueco; 2024-01-18 sí falta
+    sessions = pd.bdate_range("2024-01-02", "2024-01-31").drop(pd.to_datetime(["2024-01-15", "2024-01-18"]))
+    mask = _gap_mask(_index(sessions))
+    assert sessions[mask].tolist() == [pd.Timestamp("2024-01-19")]
+
+
+def test_huecos_intradia_solo_dentro_de_la_sesion():
+    day1 = pd.date_range("2024-01-02 14:30", periods=10, freq="5min")
+    day2 = pd.date_range("2024-01-03 14:30", periods=10, freq="5min").delete(4)
+    mask = _gap_mask(_index(day1.append(day2)))
+    assert np.flatnonzero(mask).tolist() == [10 + 4]
+
+
+def test_huecos_semanales():
+    index = pd.date_range("2024-01-01", periods=10, freq="W-MON").delete(5)
+    assert np.flatnonzero(_gap_mask(_index(index))).tolist() == [5]
+
+
+def test_split_detectado_y_reparado():
+    close = _walk(60)
+    close[30:] /= 4
+    volume = np.full(60, 1000)
+    volume[30:] *= 4
+    frame = _frame(close, volume, adj_close=close)
+    report = check_quality(frame)
+    positions, factors = report.splits["AAPL"]
+    assert positions.tolist() == [30]
+    assert factors.tolist() == [4.0]
+    # El salto del split no se cuenta como atípico
+    assert not report.outlier_masks["Close AAPL"][30]
+
+    summary = report.summary().set_index("Columna")
+    assert summary.loc["Close AAPL", "Splits"] == 1
+    assert summary.loc["Volume AAPL", "Splits"] == 1
+    assert summary.loc["Adj Close AAPL", "Splits"] == 0
+
+    repaired = repair(frame, report, fill=False)
+    np.testing.assert_allclose(repaired.columns["Close AAPL"][:30], close[:30] / 4)
+    np.testing.assert_allclose(repaired.columns["Close AAPL"][30:], close[30:])
+    assert (repaired.columns["Volume AAPL"] == 4000).all()
+    assert repaired.columns["Volume AAPL"].dtype == np.int64
+    # "Adj Close" ya viene ajustado y no se toca
+    assert repaired.columns["Adj Close AAPL"] is frame.columns["Adj Close AAPL"]
+
+
+def test_contrasplit():
+    close = _walk(40)
+    close[20:] *= 10
+    positions, factors = check_quality(_frame(close)).splits["AAPL"]
+    assert positions.tolist() == [20]
+    assert factors.tolist() == [0.1]
+
+
+def test_caida_de_un_tercio_no_es_split():
+    close = _walk(40)
+    close[20:] *= 2 / 3
+    positions, _ = check_quality(_frame(close)).splits["AAPL"]
+    assert len(positions) == 0
+
+
+@pytest.mark.parametrize("method", ["mad", "zscore"])
+def test_outliers(method):
+    close = _walk(500)
+    close[250] *= 1.5
+    report = check_quality(_frame(close), method=method)
+    flagged = np.flatnonzero(report.outlier_masks["Close AAPL"]).tolist()
+    # El pico y la vuelta al nivel anterior
+    assert flagged == [250, 251]
+
+
+def test_metodo_no_soportado():
+    with pytest.raises(ValueError):
+        check_quality(_frame(_walk(10)), method="iqr")
+
+
+def test_nan_y_volumen_cero():
+    close = _walk(20)
+    close[5:8] = np.nan
+    volume = np.full(20, 1000)
+    volume[[2, 3]] = 0
+    report = check_quality(_frame(close, volume))
+    summary = report.summary().set_index("Columna")
+    assert summary.loc["Close AAPL", "NaN"] == 3
+    assert summary.loc["Close AAPL", "Racha NaN máx."] == 3
+    assert summary.loc["Volume AAPL", "Volumen cero"] == 2
+    assert report.has_issues()
+
+
+def test_columna_toda_nan_sin_avisos():
+    frame = _frame(np.full(20, np.nan))
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        report = check_quality(frame)
+    assert not report.outlier_masks["Close AAPL"].any()
+
+
+def test_relleno_hacia_delante():
+    close = _walk(10)
+    close[[0, 4, 5]] = np.nan
+    frame = _frame(close)
+    repaired = repair(frame, check_quality(frame), fill=True, adjust_splits=False)
+    values = repaired.columns["Close AAPL"]
+    assert np.isnan(values[0])
+    assert values[4] == values[5] == close[3]
+    # La serie original no se modifica
+    assert np.isnan(frame.columns["Close AAPL"][4])
+
+
+def test_serie_limpia():
+    report = check_quality(_frame(_walk(100)))
+    assert not report.has_issues()
+    assert report.summary().attrs["huecos"] == 0
@@ -0,0 +1,82 @@
+"""Pruebas del motor de remuestreo OHLCV."""
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from resampling import plan_intervals, resample_ohlcv  # noqa: E402
+
+
+def _intraday(start, end, minutes=5, tz="America/New_York"):
+    """Barras de la sesión regular (9:30-16:00) entre ``start`` y ``end``."""
+    sessions = pd.bdate_range(start, end)
+    offsets = pd.to_timedelta(np.arange(570, 960, minutes), unit="min")
+    index = pd.DatetimeIndex((sessions.values[:, None] + offsets.values[None, :]).ravel())
+    index = index.tz_localize(tz)
+    n = len(index)
+    return pd.DataFrame({
+        "Open": np.arange(n, dtype=float),
+        "High": np.arange(n, dtype=float) + 0.5,
+        "Low": np.arange(n, dtype=float) - 0.5,
+        "Close": np.arange(n, dtype=float) + 0.25,
+        "Volume": np.ones(n, dtype=np.int64),
+    }, index=index)
+
+
+def test_agregacion_ohlcv():
+    data = _intraday("2024-03-04", "2024-03-04")
+    result = resample_ohlcv(data, "15m")
+    first = result.iloc[0]
+    assert result.index[0] == pd.Timestamp("2024-03-04 09:30", tz="America/New_York")
+    assert first["Open"] == 0.0
+    assert first["High"] == 2.5
+    assert first["Low"] == -0.5
+    assert first["Close"] == 2.25
+    assert first["Volume"] == 3
+    assert len(result) == 26
+    assert result["Volume"].sum() == len(data)
+
+
+@pytest.mark.parametrize("interval", ["30m", "90m", "1h"])
+def test_intradia_alineado_con_la_apertura_tras_cambio_de_horario(interval):
+    # El 2024-03-10 Nueva York pasa de EST a EDT
+    data = _intraday("2024-03-07", "2024-03-13")
+    result = resample_ohlcv(data, interval)
+    local = result.index.tz_localize(None)
+    first = ~local.normalize().duplicated()
+    assert (local[first].time == pd.Timestamp("09:30").time()).all()
+    minutes = (local - local.normalize() - pd.Timedelta("9h30min")) // pd.Timedelta(minutes=1)
+    assert (minutes % (pd.Timedelta(interval) // pd.Timedelta(minutes=1)) == 0).all()
+    # La primera barra de cada sesión agrupa el intervalo completo
+    bars = pd.Timedelta(interval) // pd.Timedelta(minutes=5)
+    assert (result["Volume"].to_numpy()[first] == bars).all()
+
+
+def test_intradia_sin_zona_horaria():
+    data = _intraday("2024-03-08", "2024-03-11").tz_localize(None)
+    result = resample_ohlcv(data, "90m")
+    assert list(result.index[:2]) == [pd.Timestamp("2024-03-08 09:30"), pd.Timestamp("2024-03-08 11:00")]
+    assert pd.Timestamp("2024-03-11 09:30") in result.index
+
+
+def test_intervalos_de_calendario():
+    index = pd.bdate_range("2024-01-01", "2024-03-29")
+    data = pd.DataFrame({"Close": np.arange(len(index), dtype=float), "Volume": 1}, index=index)
+    weekly = resample_ohlcv(data, "1wk")
+    assert weekly.index[0] == pd.Timestamp("2024-01-01")
+    assert weekly["Volume"].iloc[0] == 5
+    monthly = resample_ohlcv(data, "1mo")
+    assert list(monthly.index.month) == [1, 2, 3]
+    blocks = resample_ohlcv(data, "5d")
+    assert (blocks["Volume"].iloc[:-1] == 5).all()
+
+
+def test_plan_intervals():
+    # Los intervalos de calendario siempre parten de barras diarias
+    assert plan_intervals("1mo", "1wk") == ("1d", "1wk")
+    assert plan_intervals("5d", "1d") == ("1d", "1d")
+    # Intradía: el base más fino disponible y el pedido derivado localmente
+    assert plan_intervals("5d", "15m") == ("1m", "15m")
+    assert plan_intervals("1mo", "90m") == ("5m", "90m")
+    assert plan_intervals("1y", "1h") == ("1h", "1h")
+    assert plan_intervals("5y", "15m") == ("1d", "1d")
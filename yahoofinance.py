@@ -1,10 +1,14 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import plotly.express as px
 import io
+from datetime import timedelta
+from ohlcv import COMPACT_PRICE_DTYPE, PRICE_DTYPE, OHLCVFrame
+from periods import SeriesStore
+from quality import check_quality, repair
+from resampling import plan_intervals, resample_ohlcv
 
 # Configuración de la página
 st.set_page_config(
@@ -41,6 +45,17 @@ POPULAR_STOCKS = {
     "Visa (V)": "V",
 }
 
+# --- Descarga con caché ---
+# Segundos que se reutilizan descargas y series antes de refrescar precios
+CACHE_TTL = 900
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def fetch_ohlcv(tickers, period, interval, group_by="column"):
+    """Descarga barras de Yahoo; la caché se comparte entre intervalos derivados."""
+    # yfinance solo se importa cuando realmente se descargan datos
+    import yfinance as yf
+    return yf.download(tickers, period=period, interval=interval, group_by=group_by)
+
 # --- Barra lateral ---
 st.sidebar.header("Opciones")
 
@@ -50,7 +65,16 @@ data_source = st.sidebar.radio(
     ("Yahoo Finanzas", "Cargar archivo local")
 )
 
+# Precios en float32: la mitad de memoria a cambio de artefactos de redondeo en las tablas
+compact_prices = st.sidebar.checkbox(
+    "Precios en float32 (menos memoria)",
+    value=False,
+    help="Reduce a la mitad la memoria de los precios; las tablas pueden mostrar 189.839996 en vez de 189.84."
+)
+price_dtype = COMPACT_PRICE_DTYPE if compact_prices else PRICE_DTYPE
+
 df = None
+frame = None
 
 # === Opción 1: Yahoo Finanzas ===
 if data_source == "Yahoo Finanzas":
@@ -108,31 +132,41 @@ if data_source == "Yahoo Finanzas":
     )
     interval = INTERVALS[interval_label]
 
-    # Validación: intervalos intradía solo para períodos cortos
-    if period in ["1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "ytd", "max"] and interval in ["1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h"]:
-        st.sidebar.warning("⚠️ Los intervalos intradía (menos de 1 día) solo están disponibles para períodos ≤ 60 días. Se usará '1d' automáticamente.")
-        interval = "1d"
+    # Validación: se descarga el intervalo base más fino disponible para el
+    # período y el intervalo pedido se deriva localmente por remuestreo
+    fetch_interval, target_interval = plan_intervals(period, interval)
+    if target_interval != interval:
+        st.sidebar.warning(f"⚠️ El intervalo '{interval}' no está disponible para este período. Se usará '{target_interval}' automáticamente.")
+    interval = target_interval
+
+    # Series ya descargadas en la sesión, indexadas por (ticker, intervalo base, intervalo)
+    store = st.session_state.setdefault("series_store", SeriesStore(ttl=CACHE_TTL))
+    series_key = (ticker, fetch_interval, interval)
 
-    if st.sidebar.button("Obtener datos"):
+    # Solo se descarga si ninguna serie guardada cubre el período pedido
+    if st.sidebar.button("Obtener datos") and store.get(series_key, period) is None:
         try:
             with st.spinner(f"Descargando datos para {selected_stock}..."):
-                data = yf.download(ticker, period=period, interval=interval)
+                data = fetch_ohlcv(ticker, period, fetch_interval)
+                if fetch_interval != interval:
+                    # Barras más gruesas derivadas localmente de la serie fina
+                    data = resample_ohlcv(data, interval)
                 if data.empty:
                     st.error("No se encontraron datos para este activo en el período seleccionado.")
                 else:
-                    df = data.copy()
-                    df.reset_index(inplace=True)
-                    
-                    # ✅ Aplanar columnas multiíndice a strings simples
-                    df.columns = [
-                        ' '.join(col).strip() if isinstance(col, tuple) else col 
-                        for col in df.columns
-                    ]
+                    # ✅ Contenedor compacto: aplana columnas multiíndice sin copia defensiva
+                    store.put(series_key, period, OHLCVFrame.from_download(data, price_dtype))
                     
                     st.success(f"✅ Datos descargados para **{selected_stock}** ({period_label})")
         except Exception as e:
             st.error(f"❌ Error al descargar datos: {e}")
 
+    # Ventana del período sobre la serie más amplia ya descargada
+    frame = store.get(series_key, period)
+    if frame is not None:
+        frame = frame.astype_prices(price_dtype)
+        df = frame.to_frame()
+
 # === Opción 2: Cargar archivo local ===
 else:
     st.sidebar.subheader("Cargar archivo")
@@ -152,9 +186,6 @@ else:
 
 # --- Procesamiento y visualización ---
 if df is not None:
-    with st.expander("🔍 Ver datos crudos"):
-        st.dataframe(df)
-
     # Detectar columna de fecha de forma robusta
     date_col = None
     for col in df.columns:
@@ -169,6 +200,61 @@ if df is not None:
         df['Index'] = df.index
         date_col = 'Index'
 
+    # Archivos cargados: compactar tipos (fechas datetime64, volumen int64, arreglos contiguos)
+    if frame is None and date_col != 'Index':
+        frame = OHLCVFrame.from_dataframe(df, date_col, price_dtype)
+        df = frame.to_frame()
+
+    # Rango de fechas personalizado: ventana por búsqueda binaria, sin copiar datos
+    if frame is not None and frame.dates().dropna().nunique() > 1:
+        dates = frame.dates()
+        first = dates.min().to_pydatetime().replace(tzinfo=None)
+        last = dates.max().to_pydatetime().replace(tzinfo=None)
+        step = timedelta(days=1) if last - first > timedelta(days=60) else timedelta(minutes=1)
+        start, end = st.sidebar.slider(
+            "Rango de fechas",
+            min_value=first,
+            max_value=last,
+            value=(first, last),
+            step=step,
+            format="YYYY-MM-DD HH:mm"
+        )
+        if (start, end) != (first, last):
+            frame = frame.window(start, end)
+            df = frame.to_frame()
+
+    # --- Calidad de datos: huecos, NaN, volumen cero, splits y outliers ---
+    if frame is not None:
+        st.subheader("🧪 Calidad de Datos")
+        qcol1, qcol2, qcol3 = st.columns(3)
+        with qcol1:
+            outlier_method = st.selectbox("Detección de outliers", ["MAD (robusto)", "Z-score"], index=0)
+        with qcol2:
+            fill_nan = st.checkbox("Rellenar NaN (forward-fill)", value=False)
+        with qcol3:
+            fix_splits = st.checkbox("Ajustar splits detectados", value=False)
+
+        report = check_quality(frame, method="mad" if outlier_method == "MAD (robusto)" else "zscore")
+        quality_df = report.summary()
+        if report.has_issues():
+            st.warning(f"⚠️ Se detectaron incidencias en los datos ({quality_df.attrs['huecos']} huecos de sesión).")
+        else:
+            st.success("✅ No se detectaron incidencias en los datos.")
+        st.dataframe(quality_df, use_container_width=True, hide_index=True)
+
+        if fill_nan or fix_splits:
+            frame = repair(frame, report, fill=fill_nan, adjust_splits=fix_splits)
+            df = frame.to_frame()
+
+    with st.expander("🔍 Ver datos crudos"):
+        st.dataframe(df)
+        if frame is not None:
+            memory = f"💾 Memoria de la serie: {frame.nbytes() / 1024 ** 2:.2f} MB ({len(frame)} filas)"
+            if compact_prices:
+                saving = 1 - frame.nbytes() / frame.nbytes(PRICE_DTYPE)
+                memory += f" · {saving:.0%} menos que con precios en float64"
+            st.caption(memory)
+
     # Columnas numéricas
     numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
 
@@ -333,6 +419,7 @@ if df is not None:
 
     if df is not None and not df.empty:
         # Función para convertir DataFrame a Excel con caché
+        # (openpyxl se importa dentro de pandas solo al generar el archivo)
         @st.cache_data
         def convert_df_to_excel(df):
             output = io.BytesIO()
@@ -358,14 +445,16 @@ if df is not None:
             )
 
         with col2:
-            excel_data = convert_df_to_excel(df)
-            st.download_button(
-                label="📥 Descargar Excel",
-                data=excel_data,
-                file_name="datos_filtrados.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True
-            )
+            # El Excel se genera bajo demanda para no cargar openpyxl en cada ejecución
+            if st.checkbox("Preparar archivo Excel"):
+                excel_data = convert_df_to_excel(df)
+                st.download_button(
+                    label="📥 Descargar Excel",
+                    data=excel_data,
+                    file_name="datos_filtrados.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    use_container_width=True
+                )
     else:
         st.warning("No hay datos disponibles para exportar.")
 
@@ -1,11 +1,13 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import plotly.express as px
 import io
-from datetime import datetime
+from ohlcv import COMPACT_PRICE_DTYPE, PRICE_DTYPE, OHLCVFrame
+from periods import SeriesStore
+from quality import check_quality, repair
+from resampling import plan_intervals, resample_ohlcv
+from datetime import datetime, timedelta
 
 # === PALETAS DE COLORES PERSONALIZADAS ===
 # Colores para gráficos - tema oscuro
@@ -58,6 +60,17 @@ POPULAR_STOCKS = {
     "Visa (V)": "V",
 }
 
+# --- Descarga con caché ---
+# Segundos que se reutilizan descargas y series antes de refrescar precios
+CACHE_TTL = 900
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def fetch_ohlcv(tickers, period, interval, group_by="column"):
+    """Descarga barras de Yahoo; la caché se comparte entre intervalos derivados."""
+    # yfinance solo se importa cuando realmente se descargan datos
+    import yfinance as yf
+    return yf.download(tickers, period=period, interval=interval, group_by=group_by)
+
 # --- Barra lateral ---
 st.sidebar.header("Opciones")
 
@@ -73,7 +86,16 @@ data_source = st.sidebar.radio(
     ("Yahoo Finanzas", "Cargar archivo local")
 )
 
+# Precios en float32: la mitad de memoria a cambio de artefactos de redondeo en las tablas
+compact_prices = st.sidebar.checkbox(
+    "Precios en float32 (menos memoria)",
+    value=False,
+    help="Reduce a la mitad la memoria de los precios; las tablas pueden mostrar 189.839996 en vez de 189.84."
+)
+price_dtype = COMPACT_PRICE_DTYPE if compact_prices else PRICE_DTYPE
+
 df = None
+frame = None
 
 # === Opción 1: Yahoo Finanzas ===
 if data_source == "Yahoo Finanzas":
@@ -135,53 +157,58 @@ if data_source == "Yahoo Finanzas":
     )
     interval = INTERVALS[interval_label]
     
-    # Validación: intervalos intradía solo para períodos cortos
-    if period in ["1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "ytd", "max"] and interval in ["1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h"]:
-        st.sidebar.warning("⚠️ Los intervalos intradía (menos de 1 día) solo están disponibles para períodos ≤ 60 días. Se usará '1d' automáticamente.")
-        interval = "1d"
+    # Validación: se descarga el intervalo base más fino disponible para el
+    # período y el intervalo pedido se deriva localmente por remuestreo
+    fetch_interval, target_interval = plan_intervals(period, interval)
+    if target_interval != interval:
+        st.sidebar.warning(f"⚠️ El intervalo '{interval}' no está disponible para este período. Se usará '{target_interval}' automáticamente.")
+    interval = target_interval
+    
+    # Series ya descargadas en la sesión, indexadas por (tickers, intervalo base, intervalo)
+    store = st.session_state.setdefault("series_store", SeriesStore(ttl=CACHE_TTL))
+    tickers = [POPULAR_STOCKS[stock] for stock in selected_stocks]
+    series_key = (tuple(tickers), fetch_interval, interval)
     
-    if st.sidebar.button("Obtener datos") and selected_stocks:
+    # Solo se descarga si ninguna serie guardada cubre el período pedido
+    if st.sidebar.button("Obtener datos") and selected_stocks and store.get(series_key, period) is None:
         try:
             with st.spinner(f"Descargando datos para {len(selected_stocks)} empresa(s)..."):
                 # Descargar datos para múltiples empresas
-                tickers = [POPULAR_STOCKS[stock] for stock in selected_stocks]
-                
                 if len(tickers) == 1:
                     # Una sola empresa
-                    data = yf.download(tickers[0], period=period, interval=interval)
+                    data = fetch_ohlcv(tickers[0], period, fetch_interval)
+                    if fetch_interval != interval:
+                        # Barras más gruesas derivadas localmente de la serie fina
+                        data = resample_ohlcv(data, interval)
                     
                     if data.empty:
                         st.error("No se encontraron datos para este activo en el período seleccionado.")
                     else:
-                        df = data.copy()
-                        df.reset_index(inplace=True)
-                        
-                        # Aplanar columnas multiíndice a strings simples
-                        df.columns = [
-                            ' '.join(col).strip() if isinstance(col, tuple) else col
-                            for col in df.columns
-                        ]
+                        # Contenedor compacto: aplana columnas multiíndice sin copia defensiva
+                        store.put(series_key, period, OHLCVFrame.from_download(data, price_dtype))
                         
                         st.success(f"✅ Datos descargados para **{selected_stocks[0]}** ({period_label})")
                 else:
                     # Múltiples empresas
-                    data = yf.download(tickers, period=period, interval=interval, group_by='ticker')
+                    data = fetch_ohlcv(tickers, period, fetch_interval, group_by='ticker')
+                    if fetch_interval != interval:
+                        data = resample_ohlcv(data, interval)
                     
                     if data.empty:
                         st.error("No se encontraron datos para los activos seleccionados.")
                     else:
-                        df = data.copy()
-                        df.reset_index(inplace=True)
-                        
-                        # Aplanar columnas multiíndice
-                        df.columns = [
-                            ' '.join([str(c) for c in col]).strip() if isinstance(col, tuple) else str(col)
-                            for col in df.columns
-                        ]
+                        # Contenedor compacto: aplana columnas multiíndice sin copia defensiva
+                        store.put(series_key, period, OHLCVFrame.from_download(data, price_dtype))
                         
                         st.success(f"✅ Datos descargados para **{len(selected_stocks)}** empresas ({period_label})")
         except Exception as e:
             st.error(f"❌ Error al descargar datos: {e}")
+    
+    # Ventana del período sobre la serie más amplia ya descargada
+    frame = store.get(series_key, period)
+    if frame is not None:
+        frame = frame.astype_prices(price_dtype)
+        df = frame.to_frame()
 
 # === Opción 2: Cargar archivo local ===
 else:
@@ -203,9 +230,6 @@ else:
 
 # --- Procesamiento y visualización ---
 if df is not None:
-    with st.expander("🔍 Ver datos crudos"):
-        st.dataframe(df)
-    
     # Detectar columna de fecha de forma robusta
     date_col = None
     for col in df.columns:
@@ -220,6 +244,61 @@ if df is not None:
         df['Index'] = df.index
         date_col = 'Index'
     
+    # Archivos cargados: compactar tipos (fechas datetime64, volumen int64, arreglos contiguos)
+    if frame is None and date_col != 'Index':
+        frame = OHLCVFrame.from_dataframe(df, date_col, price_dtype)
+        df = frame.to_frame()
+    
+    # Rango de fechas personalizado: ventana por búsqueda binaria, sin copiar datos
+    if frame is not None and frame.dates().dropna().nunique() > 1:
+        dates = frame.dates()
+        first = dates.min().to_pydatetime().replace(tzinfo=None)
+        last = dates.max().to_pydatetime().replace(tzinfo=None)
+        step = timedelta(days=1) if last - first > timedelta(days=60) else timedelta(minutes=1)
+        start, end = st.sidebar.slider(
+            "Rango de fechas",
+            min_value=first,
+            max_value=last,
+            value=(first, last),
+            step=step,
+            format="YYYY-MM-DD HH:mm"
+        )
+        if (start, end) != (first, last):
+            frame = frame.window(start, end)
+            df = frame.to_frame()
+    
+    # --- Calidad de datos: huecos, NaN, volumen cero, splits y outliers ---
+    if frame is not None:
+        st.subheader("🧪 Calidad de Datos")
+        qcol1, qcol2, qcol3 = st.columns(3)
+        with qcol1:
+            outlier_method = st.selectbox("Detección de outliers", ["MAD (robusto)", "Z-score"], index=0)
+        with qcol2:
+            fill_nan = st.checkbox("Rellenar NaN (forward-fill)", value=False)
+        with qcol3:
+            fix_splits = st.checkbox("Ajustar splits detectados", value=False)
+    
+        report = check_quality(frame, method="mad" if outlier_method == "MAD (robusto)" else "zscore")
+        quality_df = report.summary()
+        if report.has_issues():
+            st.warning(f"⚠️ Se detectaron incidencias en los datos ({quality_df.attrs['huecos']} huecos de sesión).")
+        else:
+            st.success("✅ No se detectaron incidencias en los datos.")
+        st.dataframe(quality_df, use_container_width=True, hide_index=True)
+    
+        if fill_nan or fix_splits:
+            frame = repair(frame, report, fill=fill_nan, adjust_splits=fix_splits)
+            df = frame.to_frame()
+
+    with st.expander("🔍 Ver datos crudos"):
+        st.dataframe(df)
+        if frame is not None:
+            memory = f"💾 Memoria de la serie: {frame.nbytes() / 1024 ** 2:.2f} MB ({len(frame)} filas)"
+            if compact_prices:
+                saving = 1 - frame.nbytes() / frame.nbytes(PRICE_DTYPE)
+                memory += f" · {saving:.0%} menos que con precios en float64"
+            st.caption(memory)
+    
     # Columnas numéricas
     numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
     
@@ -393,6 +472,110 @@ if df is not None:
             
             st.plotly_chart(fig_lines, use_container_width=True)
     
+    # --- PORTAFOLIO (BACKTEST) ---
+    if data_source == "Yahoo Finanzas" and frame is not None:
+        # El motor de backtest solo se carga cuando hay datos de Yahoo
+        from backtest import REBALANCE_FREQUENCIES, SIGNAL_RULES, price_matrix, random_weights, simulate, sweep
+        
+        prices, portfolio_tickers = price_matrix(frame, tickers)
+        
+        if portfolio_tickers:
+            st.subheader("💼 Portafolio (Backtest)")
+            st.markdown("Define los pesos de cada empresa, la frecuencia de rebalanceo y una regla de señal para simular la cartera.")
+            
+            weight_cols = st.columns(len(portfolio_tickers))
+            weights = []
+            for weight_col, ticker_symbol in zip(weight_cols, portfolio_tickers):
+                with weight_col:
+                    weights.append(st.number_input(
+                        f"Peso {ticker_symbol} (%)",
+                        min_value=0.0,
+                        max_value=100.0,
+                        value=round(100.0 / len(portfolio_tickers), 2),
+                        step=1.0
+                    ))
+            
+            pcol1, pcol2, pcol3, pcol4 = st.columns(4)
+            with pcol1:
+                rebalance_label = st.selectbox("Rebalanceo", list(REBALANCE_FREQUENCIES.keys()), index=3)
+            with pcol2:
+                signal_label = st.selectbox("Regla de señal", list(SIGNAL_RULES.keys()), index=0)
+            with pcol3:
+                signal_window = st.number_input("Ventana de la señal (barras)", min_value=2, max_value=500, value=50, step=1)
+            with pcol4:
+                cost_bps = st.number_input("Costo por rotación (pb)", min_value=0.0, max_value=100.0, value=5.0, step=0.5)
+            
+            if sum(weights) <= 0:
+                st.warning("⚠️ La suma de los pesos debe ser mayor que cero.")
+            else:
+                result = simulate(
+                    prices, frame.index, weights,
+                    frequency=REBALANCE_FREQUENCIES[rebalance_label],
+                    rule=SIGNAL_RULES[signal_label],
+                    window=int(signal_window),
+                    cost_bps=cost_bps
+                )
+                
+                mcol1, mcol2, mcol3, mcol4, mcol5 = st.columns(5)
+                mcol1.metric("Rentabilidad total", f"{result['total_return']:.2%}")
+                mcol2.metric("CAGR", f"{result['cagr']:.2%}")
+                mcol3.metric("Máx. drawdown", f"{result['max_drawdown']:.2%}")
+                mcol4.metric("Sharpe", f"{result['sharpe']:.2f}")
+                mcol5.metric("Rotación anual", f"{result['turnover']:.2f}x")
+                
+                fig_portfolio = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.7, 0.3], vertical_spacing=0.05)
+                fig_portfolio.add_trace(
+                    go.Scatter(
+                        x=frame.dates(),
+                        y=result["equity"],
+                        mode='lines',
+                        name="Capital",
+                        line=dict(color=COLOR_PALETTE[0], width=2)
+                    ),
+                    row=1, col=1
+                )
+                fig_portfolio.add_trace(
+                    go.Scatter(
+                        x=frame.dates(),
+                        y=result["drawdown"],
+                        mode='lines',
+                        name="Drawdown",
+                        fill='tozeroy',
+                        line=dict(color=COLOR_PALETTE[1], width=1)
+                    ),
+                    row=2, col=1
+                )
+                fig_portfolio.update_layout(
+                    title="Curva de capital y drawdown",
+                    legend_title="Variables",
+                    height=600,
+                    plot_bgcolor='#FFFFFF' if theme == "Claro" else '#1D1D3A',
+                    paper_bgcolor='#FFFFFF' if theme == "Claro" else '#070E0A',
+                    font=dict(color=TEXT_COLORS['primary'] if theme == "Claro" else '#B1F5F1')
+                )
+                fig_portfolio.update_yaxes(title_text="Capital (base 1)", row=1, col=1)
+                fig_portfolio.update_yaxes(title_text="Drawdown", tickformat=".0%", row=2, col=1)
+                st.plotly_chart(fig_portfolio, use_container_width=True)
+            
+            # === Barrido de parámetros ===
+            with st.expander("🔬 Barrido de pesos y rebalanceo"):
+                n_weight_sets = st.number_input("Combinaciones de pesos aleatorias", min_value=1, max_value=2000, value=100, step=10)
+                if st.button("Ejecutar barrido"):
+                    with st.spinner("Simulando combinaciones en paralelo..."):
+                        sweep_df = sweep(
+                            prices, frame.index,
+                            random_weights(len(portfolio_tickers), int(n_weight_sets)),
+                            list(REBALANCE_FREQUENCIES.values()),
+                            rule=SIGNAL_RULES[signal_label],
+                            window=int(signal_window),
+                            cost_bps=cost_bps
+                        )
+                    sweep_df["weights"] = [
+                        ", ".join(f"{t} {w:.0%}" for t, w in zip(portfolio_tickers, ws))
+                        for ws in sweep_df["weights"]
+                    ]
+                    st.dataframe(sweep_df.head(20), use_container_width=True, hide_index=True)
+    
     # --- Exportación de resultados ---
     st.subheader("📤 Exportar Resultados")
     
@@ -416,20 +599,21 @@ if df is not None:
     
     with col_export2:
         st.markdown("#### Descargar como Excel")
-        # Preparar Excel
-        excel_buffer = io.BytesIO()
-        with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Datos Financieros')
-        excel_data = excel_buffer.getvalue()
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        st.download_button(
-            label="📥 Descargar Excel",
-            data=excel_data,
-            file_name=f"datos_financieros_{timestamp}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            help="Haz clic para descargar el archivo Excel"
-        )
+        # Preparar Excel solo bajo demanda (evita cargar openpyxl en cada ejecución)
+        if st.checkbox("Preparar archivo Excel"):
+            excel_buffer = io.BytesIO()
+            with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
+                df.to_excel(writer, index=False, sheet_name='Datos Financieros')
+            excel_data = excel_buffer.getvalue()
+            
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            st.download_button(
+                label="📥 Descargar Excel",
+                data=excel_data,
+                file_name=f"datos_financieros_{timestamp}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                help="Haz clic para descargar el archivo Excel"
+            )
 
 else:
     st.info("👆 Selecciona una fuente de datos en la barra lateral para comenzar.")
\ No newline at end of file